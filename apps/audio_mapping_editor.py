@@ -1,6 +1,6 @@
 from quart import Blueprint, request, jsonify
 from mappings.audio_mapper import AUDIO_PATH
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from .schema import *
 import logging
 import json
@@ -0,0 +1,174 @@
+# apps/bridge_metrics.py
+#
+# Counters and histograms of MotionBridge, cheap enough to leave on in
+# production. Every counter and histogram bucket is allocated up front for a
+# fixed set of channels and stages, so recording is an integer increment or a
+# bisect into a short bucket list, without allocation or locking. Rates,
+# quantiles and gauges are only computed when /api/metrics is scraped.
+
+import asyncio
+from bisect import bisect_left
+from collections import deque
+import time
+
+CHANNELS = ["input", "player", "output", "status", "jedi", "timeline"]
+# histogram name -> (help, label name, label values)
+HISTOGRAMS = {
+    "input_processing": ("Time to validate and map one /input message", "stage", ["validation", "mapping"]),
+    "send_motion": ("Time to send one motion package to every MotionPlayer", "command", ["motion", "motion_data"]),
+    "jedi_inference": ("Gesture model inference time of one /jedi frame", "model", ["hand", "pose", "face"]),
+    "event_loop_lag": ("Delay of a scheduled event loop wakeup", None, [""]),
+}
+GAUGES = {
+    "clients": "Connected websocket clients",
+    "queue_depth": "Messages waiting in the send queues of the clients",
+    "queue_dropped": "Messages dropped from the send queues of the connected clients",
+}
+# seconds, from 10 µs to 1 s
+LATENCY_BUCKETS = [
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+]
+LAG_INTERVAL = 0.1
+# message rates of the JSON view are averaged over this many seconds
+RATE_WINDOW = 10
+
+class Histogram:
+    """Fixed-bucket histogram, the last bucket counts values above every bound."""
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate of the q quantile, interpolated within its bucket as Prometheus does."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+    def get_stats(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.sum / self.count * 1000 if self.count else 0.0,
+            "p50_ms": (self.quantile(0.5) or 0.0) * 1000,
+            "p95_ms": (self.quantile(0.95) or 0.0) * 1000,
+            "p99_ms": (self.quantile(0.99) or 0.0) * 1000,
+        }
+
+class BridgeMetrics:
+    """
+    Message counters per websocket channel and latency histograms per stage.
+
+    monitor() runs on the event loop, measuring how late its own wakeups are
+    as event loop lag, and keeps a snapshot of the message counters every
+    second for the rates of the JSON view.
+    """
+    def __init__(self):
+        self.received = dict.fromkeys(CHANNELS, 0)
+        self.sent = dict.fromkeys(CHANNELS, 0)
+        self.histograms = {
+            name: {label: Histogram() for label in labels}
+            for name, (_, _, labels) in HISTOGRAMS.items()
+        }
+        self.start_time = time.time()
+        self.snapshots = deque(maxlen=RATE_WINDOW + 1)
+
+    def observe(self, name, label, value):
+        self.histograms[name][label].observe(value)
+
+    async def monitor(self, interval=LAG_INTERVAL):
+        lag = self.histograms["event_loop_lag"][""]
+        loop = asyncio.get_running_loop()
+        next_snapshot = loop.time()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            now = loop.time()
+            lag.observe(max(now - expected, 0.0))
+            if now >= next_snapshot:
+                self.snapshots.append((now, dict(self.received), dict(self.sent)))
+                next_snapshot += 1.0
+
+    def rates(self):
+        """Messages per second of every channel over the last RATE_WINDOW seconds."""
+        if len(self.snapshots) < 2:
+            return {channel: (0.0, 0.0) for channel in CHANNELS}
+        (start, received_start, sent_start), (end, received_end, sent_end) = self.snapshots[0], self.snapshots[-1]
+        elapsed = end - start
+        return {
+            channel: (
+                (received_end[channel] - received_start[channel]) / elapsed,
+                (sent_end[channel] - sent_start[channel]) / elapsed,
+            )
+            for channel in CHANNELS
+        }
+
+    def get_stats(self, gauges):
+        rates = self.rates()
+        return {
+            "uptime_s": time.time() - self.start_time,
+            "channels": {
+                channel: {
+                    "received": self.received[channel],
+                    "sent": self.sent[channel],
+                    "received_per_s": rates[channel][0],
+                    "sent_per_s": rates[channel][1],
+                }
+                for channel in CHANNELS
+            },
+            **gauges,
+            "latency": {
+                name: {label or "all": histogram.get_stats() for label, histogram in histograms.items()}
+                for name, histograms in self.histograms.items()
+            },
+        }
+
+    def prometheus(self, gauges):
+        """
+        Prometheus text exposition format. gauges maps a GAUGES name to a
+        dict of channel -> value, as get_stats() nests them.
+        """
+        lines = [
+            "# HELP motion_bridge_uptime_seconds Time since MotionBridge started",
+            "# TYPE motion_bridge_uptime_seconds gauge",
+            f"motion_bridge_uptime_seconds {time.time() - self.start_time:.3f}",
+        ]
+        for direction, counters in [("received", self.received), ("sent", self.sent)]:
+            name = f"motion_bridge_messages_{direction}_total"
+            lines.append(f"# HELP {name} Websocket messages {direction} per channel")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f'{name}{{channel="{channel}"}} {count}' for channel, count in counters.items())
+        for gauge, values in gauges.items():
+            name = f"motion_bridge_{gauge}"
+            lines.append(f"# HELP {name} {GAUGES[gauge]}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f'{name}{{channel="{channel}"}} {value}' for channel, value in values.items())
+        for metric, (description, label_name, _) in HISTOGRAMS.items():
+            name = f"motion_bridge_{metric}_seconds"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for label, histogram in self.histograms[metric].items():
+                labels = f'{label_name}="{label}",' if label_name else ""
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+                labels = f'{{{label_name}="{label}"}}' if label_name else ""
+                lines.append(f"{name}_sum{labels} {histogram.sum:.9f}")
+                lines.append(f"{name}_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n"
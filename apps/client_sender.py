@@ -0,0 +1,84 @@
+import asyncio
+from collections import deque
+import logging
+import time
+
+logger = logging.getLogger("MotionBridge")
+
+FORCES_QUEUE_SIZE = 16
+STATUS_QUEUE_SIZE = 8
+
+class ClientSender:
+    """
+    Bounded send queue of one websocket client, drained by its own task.
+
+    Broadcasts encode a message once and put it to every client without
+    awaiting, so a slow client only delays itself. When its queue is full
+    the oldest message is dropped, which for force and status updates is
+    always the stale one.
+    """
+    def __init__(self, client, maxsize=FORCES_QUEUE_SIZE):
+        self.client = client
+        self.maxsize = maxsize
+        self.messages = deque()
+        self.ready = asyncio.Event()
+        self.task = None
+        self.queued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def put(self, message):
+        if len(self.messages) >= self.maxsize:
+            self.messages.popleft()
+            self.dropped += 1
+        self.messages.append((time.perf_counter(), message))
+        self.queued += 1
+        self.max_depth = max(self.max_depth, len(self.messages))
+        self.ready.set()
+
+    async def _run(self):
+        while True:
+            await self.ready.wait()
+            while self.messages:
+                queued_at, message = self.messages.popleft()
+                try:
+                    await self.client.send(message)
+                except Exception as e:
+                    self.failed += 1
+                    logger.info(f"Failed to send to client {getattr(self.client, 'id', 'unknown')}: {e}")
+                    continue
+                lag = time.perf_counter() - queued_at
+                self.sent += 1
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+                self.last_lag = lag
+            self.ready.clear()
+
+    def get_stats(self):
+        return {
+            "client": getattr(self.client, "id", "unknown"),
+            "depth": len(self.messages),
+            "max_depth": self.max_depth,
+            "queued": self.queued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "mean_lag_ms": self.total_lag / self.sent * 1000 if self.sent else 0.0,
+            "max_lag_ms": self.max_lag * 1000,
+            "last_lag_ms": self.last_lag * 1000,
+        }
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.messages.clear()
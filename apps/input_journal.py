@@ -0,0 +1,82 @@
+# apps/input_journal.py
+#
+# Append-only journal of the raw messages received on /input and /jedi.
+# The file starts with a header of MAGIC, the wall time and the monotonic
+# time it was opened at. Every record is a fixed RECORD header followed by
+# the client id and the message, both UTF-8:
+#   time (monotonic seconds, f8), channel (u1), client length (u2), message length (u4)
+# Messages are stored as received, so a journal replays byte for byte.
+
+import struct
+import time
+from pathlib import Path
+
+MAGIC = b"MBJ1"
+HEADER = struct.Struct("<4sdd")
+RECORD = struct.Struct("<dBHI")
+CHANNELS = ["input", "jedi"]
+BUFFER_SIZE = 1024 * 1024
+
+def session_path(journal_dir):
+    """A new journal file in journal_dir named after the current time."""
+    return Path(journal_dir) / f"{time.strftime('%Y%m%d-%H%M%S')}.journal"
+
+class InputJournal:
+    """
+    Writer of an input journal. write() only packs a record into the file
+    buffer, the owner calls flush() periodically.
+    """
+    def __init__(self, path, clock=time.monotonic):
+        self.path = Path(path)
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "wb", buffering=BUFFER_SIZE)
+        self.file.write(HEADER.pack(MAGIC, time.time(), clock()))
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, channel, client_id, message):
+        if isinstance(message, str):
+            message = message.encode()
+        client = str(client_id).encode()
+        self.file.write(RECORD.pack(self.clock(), CHANNELS.index(channel), len(client), len(message)))
+        self.file.write(client)
+        self.file.write(message)
+        self.records += 1
+        self.bytes += RECORD.size + len(client) + len(message)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def get_stats(self):
+        return {
+            "path": str(self.path),
+            "records": self.records,
+            "bytes": self.bytes,
+        }
+
+def read_journal(path):
+    """
+    Yield the records of a journal as (time, channel, client_id, message),
+    with time in seconds from the start of the journal. A truncated last
+    record, left by a crash, is ignored.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, _, start = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an input journal")
+    offset = HEADER.size
+    while offset + RECORD.size <= len(data):
+        t, channel, client_length, message_length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        end = offset + client_length + message_length
+        if end > len(data):
+            break
+        client_id = data[offset:offset + client_length].decode()
+        message = data[offset + client_length:end].decode()
+        offset = end
+        yield t - start, CHANNELS[channel], client_id, message
@@ -0,0 +1,174 @@
+# apps/input_replay.py
+#
+# Replays an input journal against a running MotionBridge or an in-process
+# one, at the recorded pace, N times faster or as fast as possible, and
+# reports throughput and end-to-end latency. Every (channel, client) of the
+# journal gets its own websocket, as in the recorded session.
+#
+#   python -m apps.input_replay journals/20250101-120000.journal               # ws://localhost:6789, 1x
+#   python -m apps.input_replay journals/20250101-120000.journal --speed 10
+#   python -m apps.input_replay journals/20250101-120000.journal --speed 0 --in-process
+#
+# Latency is measured by a stand-in MotionPlayer on /player: every package
+# the bridge sends it is matched to the last input message sent before the
+# package was stamped, and its latency is the time from sending that
+# message until receiving the package. The stand-in is only connected to
+# an in-process bridge by default. On a running bridge it would double the
+# fan-out to the real player, and the bridge would report the target of the
+# real player as disconnected after the replay. Use --player to connect it
+# anyway. An in-process replay saves nothing, see replay_in_process.
+
+import argparse
+import asyncio
+from bisect import bisect_right
+import contextlib
+import json
+import logging
+import time
+from urllib.parse import quote
+import numpy as np
+import websockets
+from .input_journal import read_journal
+
+BRIDGE_URL = "ws://localhost:6789"
+CHANNEL_PATHS = {
+    "input": "/input",
+    "jedi": "/jedi",
+}
+# how long to wait for packages of the last messages after sending them
+SETTLE_TIME = 0.5
+
+class RemoteBridge:
+    def __init__(self, url=BRIDGE_URL):
+        self.url = url
+
+    @contextlib.asynccontextmanager
+    async def connect(self, path):
+        async with websockets.connect(self.url + path, max_size=None) as ws:
+            yield ws.send, ws.recv
+
+class InProcessBridge:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    @contextlib.asynccontextmanager
+    async def connect(self, path):
+        async with self.client.websocket(path) as ws:
+            yield ws.send, ws.receive
+
+def channel_path(channel, client_id):
+    path = CHANNEL_PATHS[channel]
+    if channel == "input":
+        path += f"?client={quote(client_id)}"
+    return path
+
+def percentiles_ms(values):
+    if not values:
+        return None
+    values = np.asarray(values) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+async def drain(receive):
+    while True:
+        await receive()
+
+async def receive_packages(receive, sent_times, latencies, received_times):
+    while True:
+        data = json.loads(await receive())
+        received = time.time()
+        received_times.append(received)
+        stamp = data.get("time_stamp")
+        if stamp is None:
+            continue
+        index = bisect_right(sent_times, stamp)
+        if index:
+            latencies.append(received - sent_times[index - 1])
+
+async def replay(records, bridge, speed=1.0, measure=False):
+    """
+    Send the records of a journal through bridge, speed times faster than
+    recorded or as fast as possible with speed 0. With measure a stand-in
+    MotionPlayer measures latency. Returns the report.
+    """
+    sent_times = []
+    lags = []
+    latencies = []
+    received_times = []
+    tasks = []
+    async with contextlib.AsyncExitStack() as stack:
+        senders = {}
+        try:
+            if measure:
+                _, receive = await stack.enter_async_context(bridge.connect("/player"))
+                tasks.append(asyncio.create_task(receive_packages(receive, sent_times, latencies, received_times)))
+            start = time.perf_counter()
+            for t, channel, client_id, message in records:
+                key = (channel, client_id)
+                if key not in senders:
+                    send, receive = await stack.enter_async_context(bridge.connect(channel_path(channel, client_id)))
+                    tasks.append(asyncio.create_task(drain(receive)))
+                    senders[key] = send
+                if speed > 0:
+                    delay = start + t / speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    lags.append(max(-delay, 0.0))
+                sent_times.append(time.time())
+                await senders[key](message)
+            await asyncio.sleep(SETTLE_TIME)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # from the first message until the last one was sent or, when measured,
+    # the bridge sent its last package, whichever is later
+    end = max(sent_times[-1:] + received_times[-1:], default=0.0)
+    elapsed = end - sent_times[0] if sent_times else 0.0
+    return {
+        "messages": len(sent_times),
+        "connections": len(senders),
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(len(sent_times) / elapsed, 1) if elapsed else None,
+        "schedule_lag_ms": percentiles_ms(lags),
+        "player_packages": len(latencies),
+        "latency_ms": percentiles_ms(latencies),
+    }
+
+async def replay_in_process(records, speed=1.0, measure=True):
+    """
+    Replay against a MotionBridge of this process with persistence off, so
+    the replay neither journals its input nor writes the live config and
+    mapping files.
+    """
+    from .motion_bridge import bridge
+    from .motion_bridge_utils import set_persistence
+    set_persistence(False)
+    try:
+        async with bridge.test_app() as app:
+            return await replay(records, InProcessBridge(app), speed, measure)
+    finally:
+        set_persistence(True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("journal", help="Input journal to replay")
+    parser.add_argument("-s", "--speed", type=float, default=1.0, help="Replay speed, 1 for the recorded pace, 0 for as fast as possible")
+    parser.add_argument("-u", "--url", default=BRIDGE_URL, help="Websocket URL of a running MotionBridge")
+    parser.add_argument("--in-process", action="store_true", help="Replay against a MotionBridge started in this process")
+    parser.add_argument("--player", action=argparse.BooleanOptionalAction, help="Measure latency with a stand-in MotionPlayer, by default only with --in-process")
+    args = parser.parse_args()
+
+    records = list(read_journal(args.journal))
+    measure = args.in_process if args.player is None else args.player
+    if args.in_process:
+        logging.getLogger("MotionBridge").setLevel(logging.WARNING)
+        report = asyncio.run(replay_in_process(records, args.speed, measure))
+    else:
+        report = asyncio.run(replay(records, RemoteBridge(args.url), args.speed, measure))
+    print(json.dumps(report, indent=4))
@@ -1,30 +1,40 @@
 from quart import Quart, request, websocket, jsonify
 from .motion_bridge_utils import *
 from .motion_editor import editor, presets, locks
-from .video_mapping_editor import video
+from editor_utils.json_writer import json_writer
+from .video_mapping_editor import video, video_mapper
+from .video_timeline import VideoTimeline
+from player.force_track import get_track
 from .audio_mapping_editor import audio
 from .motion_jedi import jedi
 from input.jedi.jedi_utils import load_jedi_config, SPECIAL_GESTURES
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from .schema import *
-from player.motion_player import MODE_LIST, TARGET_LIST, load_motion_lib
+from player.motion_player import MODE_LIST, TARGET_LIST, motion_in_lib
 import json
 import asyncio
 import subprocess
 import sys
+import time
 
 player_process = None
 haptics_process = None
 audio_process = None
 gamepad_process = None
+metrics_task = None
 
 bridge = Quart(__name__, static_folder="../public", static_url_path="/public")
 bridge.config["MAX_CONTENT_LENGTH"] = 1024 * 1024 * 200  # 500 MB
 
 @bridge.before_serving
 async def before_serving():
+    global metrics_task
     load_player_config()
     set_target_adaptors(player_config["target"])
+    haptics_mapper.set_matching(player_config["haptics_match_radius"], player_config["haptics_interpolate"])
+    open_input_journal()
+    tracer.enabled = player_config["trace"]
+    metrics_task = asyncio.create_task(metrics.monitor())
     await broadcast_status()
 
 # clients who send event inputs
@@ -39,33 +49,55 @@ async def input_channel():
     try:
         while True:
             message = await websocket.receive()
+            journal_input("input", client_id, message)
+            metrics.received["input"] += 1
+            trace_id = None
+            if tracer.enabled:
+                trace_id = tracer.new_id()
+                tracer.mark(trace_id, "ingest")
             logger.info(f"[Input: {client_id}] Received: {message}.")
             data = json.loads(message)
 
-            motion, behavior, scale, fallback = None, None, None, None
-            
+            motion, behavior, scale, fallback, layer = None, None, None, None, None
+            start = time.perf_counter()
+            validated = None
+
             if "program" in data:
                 validate(instance=data, schema=hapticsInputSchema)
+                validated = time.perf_counter()
                 program = data["program"]
                 largeMotor = data["largeMotor"]
                 smallMotor = data["smallMotor"]
                 haptics = haptics_mapper.to_haptics(largeMotor=largeMotor, smallMotor=smallMotor)
-                motion, behavior, scale, fallback = haptics_mapper.map_haptics(program=program, haptics=haptics)
+                motion, behavior, scale, fallback = haptics_mapper.map_haptics(program, haptics, largeMotor, smallMotor)
+                layer = "haptics"
                 if not motion:
-                    logger.info(f"[Input: {client_id}] New event detected. Now saving...")
-                    haptics_mapper.add_mapping(program=program, haptics=haptics)
-                    haptics_mapper.save_mapping()
+                    register_unseen_haptics(program, haptics)
             elif "timeOffset" in data:
                 validate(instance=data, schema=videoEventSchema)
+                validated = time.perf_counter()
                 motion = data["motion"]
                 behavior = data["behavior"]
                 scale = data["scale"]
                 fallback = data["fallback"]
+                layer = "video"
             elif "beat" in data:
                 motion, behavior, scale, fallback = audio_mapper.map_audio()
-            
+                layer = "audio"
+
+            mapped = time.perf_counter()
+            # only observe what ran, beat messages have no schema and
+            # messages of no known kind are neither validated nor mapped
+            if validated is not None:
+                metrics.observe("input_processing", "validation", validated - start)
+                metrics.observe("input_processing", "mapping", mapped - validated)
+            elif "beat" in data:
+                metrics.observe("input_processing", "mapping", mapped - start)
+
             if motion and behavior and scale:
-                await send_motion(motion, behavior, scale, fallback)
+                if trace_id:
+                    tracer.mark(trace_id, "mapped")
+                await send_motion(motion, behavior, scale, fallback, layer, trace_id=trace_id)
 
     except ValidationError as ve:
         logger.info(f"[Input: {client_id}] Validation Error: {ve.message}")
@@ -78,6 +110,75 @@ async def input_channel():
         logger.info(f"[Input: {client_id}] Disconnected.")
         await broadcast_status()
 
+async def dispatch_video_event(event, start_time):
+    await send_motion(event["motion"], event["behavior"], event["scale"], event["fallback"], "video", start_time)
+
+# clients who play a video and report its playback clock; the events of its
+# mapping are scheduled here instead of being sent one by one over /input
+@bridge.websocket("/timeline", endpoint="timeline_channel")
+async def timeline_channel():
+    client_id = websocket.args.get("client", "unknown")
+    client = websocket._get_current_object()
+    timeline = VideoTimeline(dispatch_video_event, send_track)
+    timeline.start()
+    timeline_clients.add(client)
+    logger.info(f"[Timeline: {client_id}] Connected!")
+
+    async def reply(package):
+        await websocket.send(json.dumps(package))
+        metrics.sent["timeline"] += 1
+
+    try:
+        while True:
+            message = await websocket.receive()
+            metrics.received["timeline"] += 1
+            try:
+                data = json.loads(message)
+                validate(instance=data, schema=videoTimelineSchema)
+            except (ValueError, ValidationError) as e:
+                logger.info(f"[Timeline: {client_id}] Invalid message: {getattr(e, 'message', e)}")
+                await reply({"error": f"Invalid message. Correct format:\n{json.dumps(videoTimelineSchema, indent=2)}"})
+                continue
+            position = data.get("position")
+            match data["command"]:
+                case "load":
+                    mapping = video_mapper.get_mapping(data.get("videoFileName"))
+                    try:
+                        validate(instance=mapping, schema=videoMappingSchema)
+                    except ValidationError:
+                        await reply({"error": f"No valid mapping for video {data.get('videoFileName')}."})
+                        continue
+                    track = None
+                    if data.get("track"):
+                        track, _, _ = await asyncio.to_thread(get_track, mapping)
+                    timeline.load(mapping, track)
+                    logger.info(f"[Timeline: {client_id}] Loaded {len(timeline.events)} events of {timeline.name}.")
+                    await reply({"command": "loaded", "events": len(timeline.events), "track": track})
+                case "play":
+                    timeline.play(position, data.get("rate"))
+                case "pause":
+                    timeline.pause(position)
+                case "seek":
+                    if position is not None:
+                        timeline.seek(position)
+                case "rate":
+                    if data.get("rate") is not None:
+                        timeline.set_rate(data["rate"], position)
+                case "clock":
+                    if position is not None:
+                        timeline.report(position)
+                case "stats":
+                    await reply({"command": "stats", "stats": timeline.get_stats()})
+    except asyncio.CancelledError:
+        logger.info(f"[Timeline: {client_id}] Disconnected.")
+    except Exception as e:
+        logger.info(f"[Timeline: {client_id}] Error: {e}")
+    finally:
+        timeline_clients.discard(client)
+        timeline.stop()
+        if timeline.track is not None and timeline.playing:
+            await send_track(None)
+
 # fallback for the motion player
 # may add authentication later
 @bridge.websocket("/player", endpoint="player_channel")
@@ -90,7 +191,20 @@ async def player_channel():
     try:
         while True:
             message = await websocket.receive()
+            received = time.time()
+            metrics.received["player"] += 1
             data = json.loads(message)
+            if data.get("command") == "ping":
+                await websocket.send(json.dumps({
+                    "command": "pong",
+                    "t0": data.get("t0"),
+                    "t1": received,
+                    "t2": time.time()
+                }))
+                continue
+            if data.get("command") == "trace":
+                tracer.add(data.get("marks", []))
+                continue
             forces = data.get("forces")
             if forces:
                 await broadcast_forces(forces, True)
@@ -111,8 +225,10 @@ async def player_channel():
     except Exception as e:
         logger.info(f"[MotionPlayer] Error: {e}")
     finally:
-        player_config["target_connected"] = False
         player_clients.discard(player)
+        # another player, such as a replay stand-in, may leave while the real one stays
+        if not player_clients:
+            player_config["target_connected"] = False
         logger.info(f"[MotionPlayer] Disconnected.")
         await broadcast_status()
 
@@ -123,17 +239,17 @@ async def status_channel():
     client_id = websocket.args.get("client", "unknown")
     client = websocket._get_current_object()
     client.id = client_id
-    status_clients.add(client)
+    add_client(status_clients, client)
     logger.info(f"[Output: {client_id}] Connected!")
     await broadcast_status()
     try:
         while True:
             message = await websocket.receive()
-            pass
+            metrics.received["status"] += 1
     except Exception as e:
         logger.info(f"[Output: {client_id}] Error: {e}")
     finally:
-        status_clients.discard(client)
+        remove_client(status_clients, client)
         logger.info(f"[Output: {client_id}] Disconnected.")
         await broadcast_status()
 
@@ -144,16 +260,17 @@ async def output_channel():
     client_id = websocket.args.get("client", "unknown")
     client = websocket._get_current_object()
     client.id = client_id
-    output_clients.add(client)
+    add_client(output_clients, client)
     logger.info(f"[Output: {client_id}] Connected!")
     await broadcast_status()
     try:
         while True:
             message = await websocket.receive()
+            metrics.received["output"] += 1
     except Exception as e:
         logger.info(f"[Output: {client_id}] Error: {e}")
     finally:
-        output_clients.discard(client)
+        remove_client(output_clients, client)
         logger.info(f"[Output: {client_id}] Disconnected.")
         await broadcast_status()
 
@@ -186,6 +303,31 @@ async def player_api():
         logger.info(f"Unhandled error: {e}")
         return jsonify({"error": f"Unhandled error: {e}"}), 500
 
+@bridge.route("/api/player/layer", methods=["POST"])
+async def player_layer_api():
+    """
+    Update gain, priority, clip or duck of a MotionPlayer mixing layer.
+    """
+    try:
+        if not player_clients:
+            logger.info("MotionPlayer is disconnected.")
+            return jsonify({"error": "MotionPlayer is disconnected."}), 503
+        data = await request.get_json(force=True, silent=True)
+        validate(instance=data, schema=layerConfigSchema)
+        await send_layer_config(
+            data["layer"],
+            data.get("gain"),
+            data.get("priority"),
+            data.get("clip"),
+            data.get("duck")
+        )
+        return jsonify({"message": f"Sent layer {data['layer']} config to MotionPlayer."})
+    except ValidationError as ve:
+        return jsonify({"error": f"Validation Error: {ve.message}"}), 400
+    except Exception as e:
+        logger.info(f"Unhandled error: {e}")
+        return jsonify({"error": f"Unhandled error: {e}"}), 500
+
 @bridge.route("/api/player/target")
 async def get_player_targets():
     return TARGET_LIST
@@ -284,20 +426,9 @@ async def haptics_mapping_api():
             data = await request.get_json(force=True, silent=True)
             validate(instance=data, schema=hapticsMappingSchema)
             program = data["program"]
-            haptics_list = data["hapticsList"]
-            for entry in haptics_list:
-                haptics = entry["haptics"]
-                motion = entry["motion"]
-                behavior = entry["behavior"]
-                scale = entry["scale"]
-                fallback = entry["fallback"]
-                alias = entry.get("alias", None)
-                error =  haptics_mapper.update_mapping(
-                    program, haptics, motion, behavior, scale, fallback, alias
-                )
-                if error:
-                    haptics_mapper.load_mapping()
-                    return jsonify({"error": f"Invalid {error} mapped to haptics {haptics}"}), 400
+            error, haptics = haptics_mapper.update_mappings(program, data["hapticsList"])
+            if error:
+                return jsonify({"error": f"Invalid {error} mapped to haptics {haptics}"}), 400
             haptics_mapper.save_mapping()
             return jsonify(haptics_mapper.get_mapping())
         elif request.method == "PUT":
@@ -331,16 +462,9 @@ async def gesture_mapping_api():
         else:
             data = await request.get_json(force=True, silent=True)
             validate(instance=data, schema=gestureMappingsSchema)
-            for entry in data:
-                gesture = entry["gesture"]
-                motion = entry["motion"]
-                behavior = entry["behavior"]
-                frames = entry["frames"]
-                fallback = entry["fallback"]
-                error = gesture_mapper.update_mapping(gesture, motion, behavior, frames, fallback)
-                if error:
-                    gesture_mapper.load_mapping()
-                    return jsonify({"error": f"Invalid {error}. Gesture: {gesture}"}), 400
+            error, gesture = gesture_mapper.update_mappings(data)
+            if error:
+                return jsonify({"error": f"Invalid {error}. Gesture: {gesture}"}), 400
             gesture_mapper.save_mapping()
             return jsonify(gesture_mapper.get_mapping())
     except ValidationError as ve:
@@ -355,12 +479,65 @@ async def get_special_gestures():
     return SPECIAL_GESTURES
 
 
+@bridge.route("/api/clients/stats", methods=["GET"])
+async def client_stats_api():
+    """
+    Send queue depth, drops and lag of every /output and /status client.
+    """
+    return jsonify(get_client_stats())
+
+
+@bridge.route("/api/trace", methods=["GET", "POST"])
+async def trace_api():
+    """
+    GET: Export the latency trace marks of the bridge and the MotionPlayer as
+    Chrome trace JSON, to open in Perfetto or chrome://tracing.
+    POST: Enable or disable tracing, enabling it discards the previous marks.
+    """
+    if request.method == "GET":
+        return jsonify(tracer.chrome_trace())
+    try:
+        data = await request.get_json(force=True, silent=True)
+        validate(instance=data, schema=traceConfigSchema)
+        if data["enabled"] and not tracer.enabled:
+            tracer.clear()
+        tracer.enabled = data["enabled"]
+        return jsonify({"enabled": tracer.enabled})
+    except ValidationError as ve:
+        return jsonify({"error": f"Validation Error: {ve.message}"}), 400
+
+
+@bridge.route("/api/trace/summary", methods=["GET"])
+async def trace_summary_api():
+    """
+    Latency histogram and percentiles of every traced stage interval.
+    """
+    return jsonify(tracer.summary())
+
+
+@bridge.route("/api/metrics", methods=["GET"])
+async def metrics_api():
+    """
+    Message counters, client counts, send queue depths and latency histograms
+    in the Prometheus text format, or as JSON with ?format=json, which also
+    gives the message rates and latency percentiles.
+    """
+    gauges = get_metric_gauges()
+    if request.args.get("format") == "json":
+        return jsonify(metrics.get_stats(gauges))
+    return metrics.prometheus(gauges), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
 @bridge.route("/api/reload", methods=["POST"])
 async def reload_api():
     """
     Reload all mappings from config files and update motion player status.
     """
     try:
+        # write queued snapshots first, or they would land after the reload
+        # and overwrite the files and the state just loaded from them
+        flush_unseen_haptics()
+        await asyncio.to_thread(json_writer.flush)
         haptics_mapper.load_mapping()
         audio_mapper.load_mapping()
         gesture_mapper.load_mapping()
@@ -391,7 +568,7 @@ async def play_motion(motion_name):
         if not player_clients:
             logger.info("MotionPlayer is disconnected.")
             return jsonify({"error": "MotionPlayer is disconnected."}), 503
-        if motion_name not in load_motion_lib():
+        if not motion_in_lib(motion_name):
             return jsonify({"error": f"Motion {motion_name} not found in motion library."}), 404
         await send_motion(motion_name, "replace", 1.0, 0)
         return jsonify({"message": f"Sent motion {motion_name} to MotionPlayer."})
@@ -406,6 +583,11 @@ async def shutdown():
         await send_status_update(mode="shutdown")
     await asyncio.sleep(1)
     await broadcast_status()
+    flush_unseen_haptics()
+    close_input_journal()
+    if metrics_task:
+        metrics_task.cancel()
+    await asyncio.to_thread(json_writer.flush)
 
 bridge.register_blueprint(editor)
 bridge.register_blueprint(video)
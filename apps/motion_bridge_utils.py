@@ -2,30 +2,50 @@ from mappings.haptics_mapper import HapticsMapper
 from mappings.gesture_mapper import GestureMapper
 from mappings.audio_mapper import AudioMapper
 from player.motion_player import MODE_LIST, TARGET_LIST
+from player.trace import Tracer
+from .bridge_metrics import BridgeMetrics
 import logging
 from .schema import *
+from .client_sender import ClientSender, FORCES_QUEUE_SIZE, STATUS_QUEUE_SIZE
+from .input_journal import InputJournal, session_path
+import asyncio
 import json
 import time
-from jsonschema import validate
 
 __all__ = [
     "player_config",
     "load_player_config",
     "save_player_config",
+    "set_persistence",
     "player_clients",
     "input_clients",
     "output_clients",
     "status_clients",
+    "jedi_clients",
+    "timeline_clients",
     "haptics_mapper",
     "gesture_mapper",
     "audio_mapper",
     "adapt_motion",
     "adapt_signal",
     "set_target_adaptors",
+    "register_unseen_haptics",
+    "flush_unseen_haptics",
+    "open_input_journal",
+    "close_input_journal",
+    "journal_input",
+    "tracer",
+    "metrics",
+    "get_metric_gauges",
     "send_motion",
     "send_motion_data",
+    "send_track",
     "send_signal",
+    "send_layer_config",
     "send_status_update",
+    "add_client",
+    "remove_client",
+    "get_client_stats",
     "broadcast_forces",
     "broadcast_status",
     "logger",
@@ -39,8 +59,22 @@ logger = logging.getLogger("MotionBridge")
 PLAYER_CONFIG_PATH = "apps/player_config.json"
 player_config = {
     "mode": "off",
-    "target": "none"
+    "target": "none",
+    "playout_delay": 0.0,
+    "haptics_match_radius": 0,
+    "haptics_interpolate": False,
+    "input_journal": "",
+    "trace": False
 }
+UNSEEN_FLUSH_DELAY = 1.0
+JOURNAL_FLUSH_DELAY = 1.0
+# off while a journal is replayed in process, inputs are then handled as
+# usual but neither journaled nor saved to the config and mapping files
+persistence_enabled = True
+
+def set_persistence(enabled):
+    global persistence_enabled
+    persistence_enabled = enabled
 
 def load_player_config():
     global player_config
@@ -52,18 +86,36 @@ def load_player_config():
             player_config["mode"] = mode
         if target in TARGET_LIST:
             player_config["target"] = target
+        playout_delay = data.get("playout_delay", 0.0)
+        if isinstance(playout_delay, (int, float)) and playout_delay >= 0:
+            player_config["playout_delay"] = playout_delay
+        radius = data.get("haptics_match_radius", 0)
+        if isinstance(radius, (int, float)) and radius >= 0:
+            player_config["haptics_match_radius"] = radius
+        player_config["haptics_interpolate"] = bool(data.get("haptics_interpolate", False))
+        journal_dir = data.get("input_journal", "")
+        if isinstance(journal_dir, str):
+            player_config["input_journal"] = journal_dir
+        player_config["trace"] = bool(data.get("trace", False))
 
 def save_player_config():
     global player_config
+    if not persistence_enabled:
+        return
     local_config = player_config.copy()
     local_config.pop("target_connected", None)
     with open(PLAYER_CONFIG_PATH, "w") as f:
         json.dump(local_config, f, indent=4)
 
+tracer = Tracer()
+metrics = BridgeMetrics()
+
 player_clients = set()
 input_clients = set()
 output_clients = set()
 status_clients = set()
+jedi_clients = set()
+timeline_clients = set()
 haptics_mapper = HapticsMapper()
 gesture_mapper = GestureMapper()
 audio_mapper = AudioMapper()
@@ -78,7 +130,77 @@ def set_target_adaptors(_target):
     adapt_motion = None
     adapt_signal = None
 
-async def send_motion_data(motion_data, behavior, scale):
+unseen_flush = None
+
+def register_unseen_haptics(program, haptics):
+    """
+    Queue a haptics pair without mapping. Queued pairs are added to the
+    mapping and saved together UNSEEN_FLUSH_DELAY after the first of them.
+    """
+    global unseen_flush
+    if not haptics_mapper.register_unseen(program, haptics):
+        return
+    logger.info(f"New haptics {haptics} of {program} detected. Saving soon...")
+    if unseen_flush is None:
+        unseen_flush = asyncio.get_running_loop().call_later(UNSEEN_FLUSH_DELAY, flush_unseen_haptics)
+
+def flush_unseen_haptics():
+    global unseen_flush
+    if unseen_flush is not None:
+        unseen_flush.cancel()
+        unseen_flush = None
+    added = haptics_mapper.add_unseen()
+    if added and persistence_enabled:
+        haptics_mapper.save_mapping()
+        logger.info(f"Saved {added} new haptics events.")
+
+input_journal = None
+journal_flush = None
+
+def open_input_journal():
+    """Start journaling raw input messages if an input_journal directory is configured."""
+    global input_journal
+    if input_journal is None and player_config["input_journal"] and persistence_enabled:
+        input_journal = InputJournal(session_path(player_config["input_journal"]))
+        logger.info(f"Journaling input to {input_journal.path}.")
+
+def journal_input(channel, client_id, message):
+    """Append a raw inbound message to the input journal, flushed JOURNAL_FLUSH_DELAY later."""
+    global journal_flush
+    if input_journal is None:
+        return
+    input_journal.write(channel, client_id, message)
+    if journal_flush is None:
+        journal_flush = asyncio.get_running_loop().call_later(JOURNAL_FLUSH_DELAY, flush_input_journal)
+
+def flush_input_journal():
+    global journal_flush
+    if journal_flush is not None:
+        journal_flush.cancel()
+        journal_flush = None
+    if input_journal is not None:
+        input_journal.flush()
+
+def close_input_journal():
+    global input_journal
+    if input_journal is None:
+        return
+    flush_input_journal()
+    input_journal.close()
+    logger.info(f"Input journal stats: {input_journal.get_stats()}")
+    input_journal = None
+
+def get_start_time(time_stamp, start_time=None):
+    """
+    Start time on the bridge clock for a motion sent at time_stamp. Without an
+    explicit start time a configured playout delay turns the variable delivery
+    delay into a constant one.
+    """
+    if start_time is None and player_config["playout_delay"] > 0:
+        start_time = time_stamp + player_config["playout_delay"]
+    return start_time
+
+async def send_motion_data(motion_data, behavior, scale, layer=None, start_time=None, trace_id=None):
     validate(instance=motion_data, schema=motionSchema)
     package = {
         "command": "motion_data",
@@ -87,21 +209,33 @@ async def send_motion_data(motion_data, behavior, scale):
         "scale": scale,
         "time_stamp": time.time()
     }
+    if layer:
+        package["layer"] = layer
+    start_time = get_start_time(package["time_stamp"], start_time)
+    if start_time is not None:
+        package["start_time"] = start_time
+    if trace_id:
+        package["trace_id"] = trace_id
+    start = time.perf_counter()
     if not player_clients:
         logger.info(f"MotionPlayer is disconnected.")
     for player in player_clients:
         try:
             await player.send(json.dumps(package))
+            metrics.sent["player"] += 1
             logger.info(f"Sent motion data to player.")
         except Exception as e:
             logger.info(f"Failed to send motion data to player: {e}")
+    metrics.observe("send_motion", "motion_data", time.perf_counter() - start)
+    if trace_id:
+        tracer.mark(trace_id, "bridge_send")
 
-async def send_motion(motion, behavior, scale, fallback):
+async def send_motion(motion, behavior, scale, fallback, layer=None, start_time=None, trace_id=None):
     motion_data = None
     if adapt_motion:
         motion, behavior, scale, motion_data = adapt_motion(motion, behavior, scale, fallback)
     if not motion and motion_data:
-        await send_motion_data(motion_data, behavior, scale)
+        await send_motion_data(motion_data, behavior, scale, layer, start_time, trace_id)
         return
     package = {
         "command": "motion",
@@ -110,14 +244,46 @@ async def send_motion(motion, behavior, scale, fallback):
         "scale": scale,
         "time_stamp": time.time()
     }
+    if layer:
+        package["layer"] = layer
+    start_time = get_start_time(package["time_stamp"], start_time)
+    if start_time is not None:
+        package["start_time"] = start_time
+    if trace_id:
+        package["trace_id"] = trace_id
+    start = time.perf_counter()
     if not player_clients:
         logger.info(f"MotionPlayer is disconnected. Package: {package}")
     for player in player_clients:
         try:
             await player.send(json.dumps(package))
+            metrics.sent["player"] += 1
             logger.info(f"Sent motion to player. Package: {package}")
         except Exception as e:
             logger.info(f"Failed to send motion to player: {e}")
+    metrics.observe("send_motion", "motion", time.perf_counter() - start)
+    if trace_id:
+        tracer.mark(trace_id, "bridge_send")
+
+async def send_track(track, position=0.0, rate=1.0, start_time=None):
+    """Start streaming a rendered force track from position on, or stop it with track None."""
+    package = {
+        "command": "track",
+        "track": track,
+        "position": position,
+        "rate": rate,
+        "time_stamp": time.time()
+    }
+    if start_time is not None:
+        package["start_time"] = start_time
+    if not player_clients:
+        logger.info(f"MotionPlayer is disconnected. Package: {package}")
+    for player in player_clients:
+        try:
+            await player.send(json.dumps(package))
+            logger.info(f"Sent track to player. Package: {package}")
+        except Exception as e:
+            logger.info(f"Failed to send track to player: {e}")
 
 async def send_signal(signal, muted=True):
     if adapt_signal:
@@ -133,12 +299,31 @@ async def send_signal(signal, muted=True):
     for player in player_clients:
         try:
             await player.send(json.dumps(package))
+            metrics.sent["player"] += 1
             if not muted:
                 logger.info(f"Sent signal to player. Package: {package}")
         except Exception as e:
             if not muted:
                 logger.info(f"Failed to send signal to player: {e}")
 
+async def send_layer_config(layer, gain=None, priority=None, clip=None, duck=None):
+    package = {
+        "command": "layer",
+        "layer": layer,
+        "gain": gain,
+        "priority": priority,
+        "clip": clip,
+        "duck": duck
+    }
+    if not player_clients:
+        logger.info(f"MotionPlayer is disconnected. Package: {package}")
+    for player in player_clients:
+        try:
+            await player.send(json.dumps(package))
+            logger.info(f"Sent layer config to player. Package: {package}")
+        except Exception as e:
+            logger.info(f"Failed to send layer config to player: {e}")
+
 async def send_status_update(mode=None, target=None):
     package = {
         "command": "mode_update"
@@ -158,6 +343,48 @@ async def send_status_update(mode=None, target=None):
         except Exception as e:
             logger.info(f"Failed to send status to player: {e}")
 
+def add_client(clients, client):
+    """Register an /output or /status client and start its send queue."""
+    maxsize = STATUS_QUEUE_SIZE if clients is status_clients else FORCES_QUEUE_SIZE
+    client.sender = ClientSender(client, maxsize)
+    client.sender.start()
+    clients.add(client)
+
+def remove_client(clients, client):
+    clients.discard(client)
+    sender = getattr(client, "sender", None)
+    if sender:
+        sender.stop()
+
+def get_client_stats():
+    return {
+        "output_clients": [client.sender.get_stats() for client in output_clients],
+        "status_clients": [client.sender.get_stats() for client in status_clients],
+    }
+
+def get_metric_gauges():
+    """Client counts and send queue depths per channel, for the metrics views."""
+    queues = {"output": output_clients, "status": status_clients}
+    return {
+        # jedi clients are registered as input and output clients too
+        "clients": {
+            "input": len(input_clients - jedi_clients),
+            "player": len(player_clients),
+            "output": len(output_clients - jedi_clients),
+            "status": len(status_clients),
+            "jedi": len(jedi_clients),
+            "timeline": len(timeline_clients),
+        },
+        "queue_depth": {
+            channel: sum(len(client.sender.messages) for client in clients)
+            for channel, clients in queues.items()
+        },
+        "queue_dropped": {
+            channel: sum(client.sender.dropped for client in clients)
+            for channel, clients in queues.items()
+        },
+    }
+
 async def broadcast_forces(forces, muted=True):
     package = {
         "command": "forces",
@@ -166,14 +393,13 @@ async def broadcast_forces(forces, muted=True):
     if not output_clients:
         if not muted:
             logger.info(f"No output clients connected. Package: {package}")
+        return
+    message = json.dumps(package)
     for client in output_clients:
-        try:
-            await client.send(json.dumps(package))
-            if not muted:
-                logger.info(f"Sent forces to output client. Package: {package}")
-        except Exception as e:
-            if not muted:
-                logger.info(f"Failed to send forces to output client: {e}")
+        client.sender.put(message)
+    metrics.sent["output"] += len(output_clients)
+    if not muted:
+        logger.info(f"Queued forces for {len(output_clients)} output clients. Package: {package}")
 
 async def broadcast_status():
     package = {
@@ -184,9 +410,10 @@ async def broadcast_status():
         "output_clients": [client.id for client in output_clients],
         "target_connected": player_config.get("target_connected", False)
     }
+    if not status_clients:
+        return
+    message = json.dumps(package)
     for client in status_clients:
-        try:
-            await client.send(json.dumps(package))
-            logger.info(f"Sent status to output client. Package: {package}")
-        except Exception as e:
-            logger.info(f"Failed to send status to output client: {e}")
\ No newline at end of file
+        client.sender.put(message)
+    metrics.sent["status"] += len(status_clients)
+    logger.info(f"Queued status for {len(status_clients)} status clients. Package: {package}")
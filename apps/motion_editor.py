@@ -1,11 +1,13 @@
 from quart import Blueprint, request, jsonify
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from .schema import *
 from generator import *
 import json
 import logging
 from pathlib import Path
-from player.motion_player import load_motion_lib, load_motion
+from player.motion_player import load_motion_lib, load_motion_metadata, motion_in_lib, motion_catalog, motion_index
+from player.motion_catalog import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from player.motion_store import read_motion, write_motion, rename_motion, delete_motion
 from editor_utils.motion_presets import MotionPresets, MOTION_TYPES
 from editor_utils.motion_locks import MotionLocks
 
@@ -62,7 +64,7 @@ async def generate_motion():
         if not schema or not generate:
             return jsonify({"error": "Invalid motion type"}), 400
         validate(instance=data, schema=schema)
-        if data["name"] in load_motion_lib() and locks.is_motion_locked(data["name"]):
+        if motion_in_lib(data["name"]) and locks.is_motion_locked(data["name"]):
             return jsonify({"error": f"Motion {data["name"]} is protected."}), 400
         motion = generate(data)
         return jsonify(motion)
@@ -80,12 +82,12 @@ async def save_motion():
     try:
         data = await request.get_json(force=True, silent=True)
         validate(instance=data, schema=motionSchema)
-        if data["name"] in load_motion_lib() and locks.is_motion_locked(data["name"]):
+        if motion_in_lib(data["name"]) and locks.is_motion_locked(data["name"]):
             return jsonify({"error": "Motion name already exists"}), 400
         motion_name = data["name"]
-        fpath = motion_dir / f"{motion_name}.json"
-        with open(fpath, "w") as f:
-            json.dump(data, f, indent=4)
+        fpath = write_motion(data, motion_dir)
+        motion_catalog.add(motion_name)
+        motion_index.update(motion_name)
         locks.unlock_motion(motion_name)
         logger.info(f"Saved motion to {fpath}")
         return jsonify({"message": f"Motion {motion_name} saved successfully!"}), 200
@@ -103,11 +105,9 @@ async def edit_motion_api(motion_name):
     logger.info(f"Accessing motion {motion_name} with method {request.method}")
     try:
         if request.method == "GET":
-            fpath = motion_dir / f"{motion_name}.json"
-            if not fpath.exists():
+            motion_data = read_motion(motion_name, motion_dir)
+            if motion_data is None:
                 return jsonify({"error": "Motion not found"}), 404
-            with open(fpath, "r") as f:
-                motion_data = json.load(f)
             validate(instance=motion_data, schema=motionSchema)
             return jsonify(motion_data), 200
         
@@ -116,22 +116,22 @@ async def edit_motion_api(motion_name):
         validate(instance=data, schema=schema)
         if locks.is_motion_locked(motion_name):
             return jsonify({"error": "Motion is locked."}), 403
-        fpath = motion_dir / f"{motion_name}.json"
-        if not fpath.exists():
+        if not motion_in_lib(motion_name, include_none=False):
             return jsonify({"error": "Motion not found"}), 404
         logger.info(f"Received update for motion {motion_name}.")
         
         if request.method == "POST":
             new_motion_name = data["name"]
             is_rename_request = motion_name != new_motion_name
-            if is_rename_request and new_motion_name in load_motion_lib():
+            if is_rename_request and motion_in_lib(new_motion_name):
                 return jsonify({"error": "Motion name already exists"}), 400
-            with open(fpath, "w") as f:
-                json.dump(data, f, indent=4)
+            write_motion(data, motion_dir, name=motion_name)
+            motion_index.update(motion_name)
             logger.info(f"Updated motion {motion_name}")
             if is_rename_request:
-                new_fpath = motion_dir / f"{new_motion_name}.json"
-                fpath.rename(new_fpath)
+                rename_motion(motion_name, new_motion_name, motion_dir)
+                motion_catalog.rename(motion_name, new_motion_name)
+                motion_index.rename(motion_name, new_motion_name)
                 presets.rename_preset(motion_name, new_motion_name)
                 locks.remove_lock(motion_name)
                 logger.info(f"Renamed motion to {new_motion_name}")
@@ -141,13 +141,15 @@ async def edit_motion_api(motion_name):
             scale = data["scale"]
             motion = data["motion"]
             scaled_motion = scale_motion(motion, scale)
-            with open(fpath, "w") as f:
-                json.dump(scaled_motion, f, indent=4)
+            write_motion(scaled_motion, motion_dir, name=motion_name)
+            motion_index.update(motion_name)
             logger.info(f"Scaled motion {motion_name} by factor {scale}")
             return jsonify(scaled_motion), 200
 
         if request.method == "DELETE":
-            fpath.unlink()
+            delete_motion(motion_name, motion_dir)
+            motion_catalog.discard(motion_name)
+            motion_index.discard(motion_name)
             presets.remove_preset(motion_name)
             locks.remove_lock(motion_name)
             logger.info(f"Deleted motion {motion_name}")
@@ -172,24 +174,72 @@ async def get_motion_list():
         logger.info(f"Unhandled error: {e}")
         return jsonify({"error": f"Unhandled error: {e}"}), 500
 
+@editor.route("/motion/search")
+async def search_motion_list():
+    """
+    One page of the sorted motion names, optionally filtered by name prefix
+    and by a case insensitive substring.
+    """
+    try:
+        offset = request.args.get("offset", 0, type=int)
+        limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+        if offset < 0 or not 0 < limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}"}), 400
+        total, motions = motion_catalog.query(
+            prefix=request.args.get("prefix"),
+            contains=request.args.get("q"),
+            offset=offset,
+            limit=limit,
+        )
+        return jsonify({"total": total, "offset": offset, "limit": limit, "motions": motions}), 200
+    except Exception as e:
+        logger.info(f"Unhandled error: {e}")
+        return jsonify({"error": f"Unhandled error: {e}"}), 500
+
 @editor.route("/motion/<motion_name>/metadata")
 async def get_motion_metadata(motion_name):
     try:
-        motion_data = load_motion(motion_name)
-        if not motion_data:
+        metadata = load_motion_metadata(motion_name)
+        if not metadata:
             return jsonify({"error": "Motion not found"}), 404
-        validate(instance=motion_data, schema=motionSchema)
-        del motion_data["flShape"]
-        del motion_data["frShape"]
-        del motion_data["rlShape"]
-        del motion_data["rrShape"]
-        return motion_data
+        validate(instance=metadata, schema=motionMetadataSchema)
+        return metadata
     except ValidationError:
         return jsonify({"error": f"Motion data is corrupted."}), 500
     except Exception as e:
         logger.info(f"Unhandled error: {e}")
         return jsonify({"error": f"Unhandled error: {e}"}), 500
 
+@editor.route("/motion/metadata", methods=["GET", "POST"])
+async def get_bulk_motion_metadata():
+    """
+    Metadata of many motions by name, from ?names=a,b or a POSTed
+    {"names": [...]}, or of every motion without names. Motions that do not
+    exist or have corrupted metadata are left out.
+    """
+    try:
+        if request.method == "POST":
+            data = await request.get_json(force=True, silent=True)
+            names = data.get("names") if isinstance(data, dict) else None
+            if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+                return jsonify({"error": "Expected {\"names\": [motion names]}"}), 400
+        elif request.args.get("names"):
+            names = request.args.get("names").split(",")
+        else:
+            names = load_motion_lib(include_none=False)
+        result = {}
+        for name, metadata in motion_index.get_many(names).items():
+            try:
+                validate(instance=metadata, schema=motionMetadataSchema)
+            except ValidationError:
+                logger.info(f"Motion {name} has corrupted metadata.")
+                continue
+            result[name] = metadata
+        return jsonify(result), 200
+    except Exception as e:
+        logger.info(f"Unhandled error: {e}")
+        return jsonify({"error": f"Unhandled error: {e}"}), 500
+
 @editor.route("/motion/preset", methods=["GET", "POST"])
 async def motion_preset_api():
     try:
@@ -17,6 +17,10 @@ gesture_csv_writer = None
 
 models = load_models()
 
+async def send_to_jedi(message):
+    await websocket.send(message)
+    metrics.sent["jedi"] += 1
+
 # Jedi related
 def get_player_mode():
     return player_to_jedi(player_config.get("mode"))
@@ -49,7 +53,8 @@ async def jedi_channel():
     client.id = "jedi"
     logger.info(f"Jedi Connected!")
     input_clients.add(client)
-    output_clients.add(client)
+    jedi_clients.add(client)
+    add_client(output_clients, client)
     await broadcast_status()
 
     last_inference_time = 0
@@ -63,12 +68,14 @@ async def jedi_channel():
         "mode": initial_mode
     })
 
-    await websocket.send(mode_update)
+    await send_to_jedi(mode_update)
     logger.info("Sent initial mode update: %s", get_player_mode())
 
     try:
         while True:
             message = await websocket.receive()
+            journal_input("jedi", client.id, message)
+            metrics.received["jedi"] += 1
             now = time.perf_counter()
             if now - last_inference_time < min_interval:
                 continue
@@ -100,7 +107,7 @@ async def jedi_channel():
                         "command": "mode_update",
                         "mode": get_player_mode()
                     })
-                    await websocket.send(mode_update)
+                    await send_to_jedi(mode_update)
                     logger.info("Sent mode update: %s", get_player_mode())
 
                 # Always call update_system_state
@@ -127,7 +134,7 @@ async def jedi_channel():
                                 "inference_time": 0,
                                 "total_inference_time": 0
                             })
-                            await websocket.send(gesture_update)
+                            await send_to_jedi(gesture_update)
                             last_matched_gesture = "none"
                             continue
                     else:
@@ -150,7 +157,7 @@ async def jedi_channel():
                                 "inference_time": 0,
                                 "total_inference_time": 0
                             })
-                            await websocket.send(gesture_update)
+                            await send_to_jedi(gesture_update)
                             last_matched_gesture = "none"
                             continue
 
@@ -165,18 +172,20 @@ async def jedi_channel():
 
                     input_tensor = np.array(features, dtype=np.float32).reshape(1, -1)
                     detected_gesture, inference_time = run_inference(models[model_type], input_tensor, model_type)
+                    metrics.observe("jedi_inference", model_type, inference_time / 1000)
 
                     total_inference_time = mediapipe_time + inference_time
                     # logger.info("Detected %s gesture: %s (model inference: %.2fms, total inference: %.2fms)", model_type, detected_gesture, inference_time, total_inference_time)
 
-                    if detected_gesture not in gesture_mapper.mapping:
+                    gesture_record = gesture_mapper.lookup.get(detected_gesture)
+                    if gesture_record is None:
                         matched_gesture = "unknown"
                         current_count = 0
                         required_frames = 0
                         gesture_counter.clear()
                     else:
                         matched_gesture = detected_gesture
-                        required_frames = gesture_mapper.mapping[detected_gesture].get('frames', 3)
+                        required_frames = gesture_record.frames
                         if matched_gesture == last_matched_gesture:
                             gesture_counter[matched_gesture] = gesture_counter.get(matched_gesture, 0) + 1
                         else:
@@ -194,7 +203,7 @@ async def jedi_channel():
                         "inference_time": round(inference_time, 2),
                         "total_inference_time": round(total_inference_time, 2)
                     })
-                    await websocket.send(gesture_update)
+                    await send_to_jedi(gesture_update)
                     # logger.info("Sent gesture update: %s -> %s (%d/%d)", detected_gesture, matched_gesture, current_count, required_frames)
 
                     if matched_gesture != "unknown" and current_count >= required_frames:
@@ -203,7 +212,7 @@ async def jedi_channel():
                             continue # cannot recognize gesture from current landmarks
                         if result == matched_gesture: # gesture confirmed
                             motion, behavior, _, fallback = gesture_mapper.map_gesture(matched_gesture)
-                            await send_motion(motion, behavior, 1, fallback)
+                            await send_motion(motion, behavior, 1, fallback, "gesture")
                         else: # gesture indicates mode change
                             new_mode = result
                             await send_status_update(mode=new_mode)
@@ -212,7 +221,7 @@ async def jedi_channel():
                                 "command": "mode_update",
                                 "mode": new_jedi_mode
                             })
-                            await websocket.send(mode_update)
+                            await send_to_jedi(mode_update)
                             logger.info("Sent mode update: %s", new_jedi_mode)
 
                         # motion_player.update_system_state(latest_is_ready_flag, matched_gesture)
@@ -220,7 +229,7 @@ async def jedi_channel():
                         logger.info("Gesture %s confirmed after %d frames, state updated", matched_gesture, current_count)
                         gesture_counter[matched_gesture] = 0
                         gesture_message = json.dumps({"command": "gesture", "gesture": matched_gesture})
-                        await websocket.send(gesture_message)
+                        await send_to_jedi(gesture_message)
                         # Log gesture to CSV if enabled
                         # if args.log and gesture_csv_writer:
                         #     try:
@@ -241,6 +250,7 @@ async def jedi_channel():
     finally:
         latest_is_ready_flag = False
         input_clients.remove(client)
-        output_clients.remove(client)
+        jedi_clients.discard(client)
+        remove_client(output_clients, client)
         await broadcast_status()
         logger.info("Jedi disconnected")
\ No newline at end of file
@@ -1,4 +1,10 @@
 from player.motion_player import BEHAVIORS
+from player.motion_mixer import LAYERS
+from player.motion_store import SHAPE_KEYS
+from jsonschema import validators, ValidationError
+from jsonschema.exceptions import best_match
+import numpy as np
+import re
 
 __all__ = [
     "NAME_REGEX",
@@ -7,8 +13,10 @@ __all__ = [
     "DIRECTIONS",
     "MOTION_OPERATIONS",
     "FREQUENCY",
+    "MAX_SAMPLE",
     "forceArraySchema",
     "motionSchema",
+    "motionMetadataSchema",
     "motionScaleSchema",
     "sineMotionSchema",
     "impulseMotionSchema",
@@ -27,7 +35,12 @@ __all__ = [
     "renameSchema",
     "videoEventSchema",
     "videoMappingSchema",
+    "videoTimelineSchema",
     "youtubeVideoSchema",
+    "layerConfigSchema",
+    "traceConfigSchema",
+    "validate",
+    "validate_motion",
     ]
 
 NAME_REGEX = r"^[\w ]{1,100}$"
@@ -37,7 +50,9 @@ MAX_MAGNITUDE = 3000
 DIRECTIONS = ["heave", "pitch", "roll", "fl", "fr", "rl", "rr", "front", "rear", "left", "right"]
 MOTION_OPERATIONS = ["add", "multiply", "concat"]
 FREQUENCY = 100
+MAX_SAMPLE = 1.0
 YOUTUBE_REGEX = r"^[\w-]{11}$"
+TIMELINE_COMMANDS = ["load", "play", "pause", "seek", "rate", "clock", "stats"]
 
 forceArraySchema = {
     "type": "array",
@@ -69,6 +84,17 @@ motionSchema = {
                  "color", "shortDisplayName", "longDisplayName"],
 }
 
+# motion metadata as kept by the motion index, without the shapes
+motionMetadataSchema = {
+    "type": "object",
+    "properties": {
+        **{k: v for k, v in motionSchema["properties"].items() if k not in SHAPE_KEYS},
+        "samples": { "type": "integer", "minimum": 0 },
+        "compositionDegree": { "type": "integer", "minimum": 0 },
+    },
+    "required": [k for k in motionSchema["required"] if k not in SHAPE_KEYS],
+}
+
 motionScaleSchema = {
     "type": "object",
     "properties": {
@@ -389,6 +415,18 @@ videoMappingSchema = {
     "required": ["videoFileName", "videoEvents"],
 }
 
+videoTimelineSchema = {
+    "type": "object",
+    "properties": {
+        "command": { "type": "string", "enum": TIMELINE_COMMANDS },
+        "videoFileName": { "type": "string" },
+        "position": { "type": "number", "minimum": 0 },
+        "rate": { "type": "number", "minimum": 0.0625, "maximum": 16 },
+        "track": { "type": "boolean" }
+    },
+    "required": ["command"]
+}
+
 youtubeVideoSchema = {
     "type": "object",
     "properties": {
@@ -422,3 +460,187 @@ renameSchema = {
     },
     "required": ["oldName", "newName"]
 }
+
+layerConfigSchema = {
+    "type": "object",
+    "properties": {
+        "layer": { "type": "string", "enum": LAYERS },
+        "gain": { "type": "number", "minimum": 0, "maximum": 2 },
+        "priority": { "type": "number" },
+        "clip": { "type": "number", "minimum": 0, "maximum": 1 },
+        "duck": { "type": "number", "minimum": 0, "maximum": 1 }
+    },
+    "required": ["layer"]
+}
+
+traceConfigSchema = {
+    "type": "object",
+    "properties": {
+        "enabled": { "type": "boolean" }
+    },
+    "required": ["enabled"]
+}
+
+# Validators are compiled once per schema instead of on every validate() call.
+# Flat object schemas, which covers the /input event messages, also get a
+# plain Python check that only ever accepts instances the full validator
+# accepts; anything it is unsure about goes through the validator, which
+# raises the same errors as jsonschema.validate.
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: type(v) is int,
+    "number": lambda v: type(v) in (int, float),
+    "null": lambda v: v is None,
+    "boolean": lambda v: type(v) is bool,
+}
+
+def _compile_property(subschema):
+    types = subschema.get("type")
+    types = [types] if isinstance(types, str) else types
+    if not types or set(subschema) - {"type", "minimum", "maximum", "pattern", "enum"}:
+        return None
+    if any(t not in _TYPE_CHECKS for t in types):
+        return None
+    type_checks = [_TYPE_CHECKS[t] for t in types]
+    minimum = subschema.get("minimum")
+    maximum = subschema.get("maximum")
+    pattern = re.compile(subschema["pattern"]) if "pattern" in subschema else None
+    enum = subschema.get("enum")
+    if enum is not None and not all(isinstance(e, str) for e in enum):
+        return None
+    enum = frozenset(enum) if enum is not None else None
+
+    def check(value):
+        if not any(type_check(value) for type_check in type_checks):
+            return False
+        if isinstance(value, str):
+            if pattern is not None and not pattern.search(value):
+                return False
+            if enum is not None and value not in enum:
+                return False
+        elif enum is not None:
+            return False
+        elif value is not None:
+            if minimum is not None and not value >= minimum:
+                return False
+            if maximum is not None and not value <= maximum:
+                return False
+        return True
+    return check
+
+def _compile_flat(schema):
+    if schema.get("type") != "object" or set(schema) - {"type", "properties", "required"}:
+        return None
+    checks = {}
+    for key, subschema in schema.get("properties", {}).items():
+        check = _compile_property(subschema)
+        if check is None:
+            return None
+        checks[key] = check
+    required = tuple(schema.get("required", ()))
+
+    def check(instance):
+        if type(instance) is not dict:
+            return False
+        for key in required:
+            if key not in instance:
+                return False
+        for key, value in instance.items():
+            property_check = checks.get(key)
+            if property_check is not None and not property_check(value):
+                return False
+        return True
+    return check
+
+_compiled = {}
+
+def _compile(schema):
+    cls = validators.validator_for(schema)
+    cls.check_schema(schema)
+    entry = (schema, cls(schema), _compile_flat(schema))
+    _compiled[id(schema)] = entry
+    return entry
+
+# Motion payloads carry thousands of samples per shape, so motionSchema is
+# checked as metadata through the schema plus the four shapes as NumPy
+# arrays: numeric items, finite, within MAX_SAMPLE and of equal length.
+# Shapes with non-numeric items go through the full schema so that the error
+# points at the offending item as before.
+_motionMetadataSchema = dict(motionSchema, properties={
+    **motionSchema["properties"],
+    **{key: { "type": "array" } for key in SHAPE_KEYS},
+})
+
+def _shape_array(value):
+    if not set(map(type, value)) <= {int, float}:
+        return None
+    return np.array(value, dtype=np.float64)
+
+def _shape_error(message, key, shape, index, validator):
+    return ValidationError(message, validator=validator, path=[key, int(index)],
+                           instance=shape[index].item(), schema=motionSchema["properties"][key])
+
+def validate_motion(instance):
+    """Validate a motion payload against motionSchema with vectorized shape checks."""
+    validate(instance, _motionMetadataSchema)
+    length = None
+    for key in SHAPE_KEYS:
+        shape = _shape_array(instance[key])
+        if shape is None:
+            error = best_match(_compiled[id(motionSchema)][1].iter_errors(instance))
+            if error is not None:
+                raise error
+            raise ValidationError(f"{key} is not an array of numbers", path=[key])
+        finite = np.isfinite(shape)
+        if not finite.all():
+            index = np.argmin(finite)
+            raise _shape_error(f"{shape[index]} is not a finite sample", key, shape, index, "finite")
+        out_of_range = np.abs(shape) > MAX_SAMPLE
+        if out_of_range.any():
+            index = np.argmax(out_of_range)
+            raise _shape_error(f"{shape[index]} is outside [-{MAX_SAMPLE}, {MAX_SAMPLE}]", key, shape, index, "maximum")
+        if length is None:
+            length = len(shape)
+        elif len(shape) != length:
+            raise ValidationError(f"{key} has {len(shape)} samples, {SHAPE_KEYS[0]} has {length}",
+                                  validator="length", path=[key])
+
+def _validate_motion_scale(instance):
+    validate(instance, _motionScaleMetadataSchema)
+    try:
+        validate_motion(instance["motion"])
+    except ValidationError as error:
+        error.relative_path.appendleft("motion")
+        raise
+
+_motionScaleMetadataSchema = dict(motionScaleSchema, properties={
+    **motionScaleSchema["properties"],
+    "motion": { "type": "object" },
+})
+
+_custom_validators = {
+    id(motionSchema): validate_motion,
+    id(motionScaleSchema): _validate_motion_scale,
+}
+
+def validate(instance, schema):
+    """Cached drop-in for jsonschema.validate."""
+    custom = _custom_validators.get(id(schema))
+    if custom is not None:
+        return custom(instance)
+    entry = _compiled.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = _compile(schema)
+    _, validator, fast_check = entry
+    if fast_check is not None and fast_check(instance):
+        return
+    error = best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
+
+for _name in __all__:
+    if _name.endswith("Schema"):
+        _compile(globals()[_name])
+_compile(gestureMappingSchema)
+_compile(_motionMetadataSchema)
+_compile(_motionScaleMetadataSchema)
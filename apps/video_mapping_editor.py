@@ -1,10 +1,12 @@
 from quart import Blueprint, request, jsonify
 from mappings.video_mapper import VideoMapper, VIDEO_PATH
-from player.motion_player import load_motion
-from jsonschema import validate, ValidationError
+from player.motion_player import motion_index, FREQUENCY
+from player.force_track import get_track
+from jsonschema import ValidationError
 from .schema import *
 import logging
 import json
+import asyncio
 import aiofiles
 from pathlib import Path
 from werkzeug.utils import secure_filename
@@ -33,6 +35,30 @@ async def video_mapping_api():
         logger.info(f"Unhandled error: {e}")
         return jsonify({"error": f"Unhandled error: {e}"}), 500
 
+@video.route("/api/video-mapping/<videoFileName>/track", methods=["GET", "POST"])
+async def video_track_api(videoFileName):
+    """
+    Render the mapping of a video into a force track, or reuse the cached
+    one. The returned key is what the player streams the track by.
+    """
+    try:
+        mapping = video_mapper.get_mapping(videoFileName)
+        if mapping is None:
+            return jsonify({"error": "Video mapping not found"}), 404
+        validate(instance=mapping, schema=videoMappingSchema)
+        key, track, cached = await asyncio.to_thread(get_track, mapping)
+        return jsonify({
+            "track": key,
+            "samples": len(track),
+            "duration": len(track) / FREQUENCY,
+            "cached": cached
+        }), 200
+    except ValidationError as ve:
+        return jsonify({"error": f"Video mapping of {videoFileName} is corrupted: {ve.message}"}), 500
+    except Exception as e:
+        logger.info(f"Unhandled error: {e}")
+        return jsonify({"error": f"Unhandled error: {e}"}), 500
+
 @video.route("/api/video-mapping/<videoFileName>", methods=["GET"])
 async def get_video_mapping(videoFileName):
     try:
@@ -41,6 +67,9 @@ async def get_video_mapping(videoFileName):
             return jsonify({"error": "Video mapping not found"}), 404
         validate(instance=data, schema=videoMappingSchema)
         videoMappings = data.get("videoEvents", [])
+        # one index lookup for every referenced motion, which saves the index once
+        names = {mapping.get("motion") for mapping in videoMappings}
+        metadata = motion_index.get_many(name for name in names if isinstance(name, str) and name != "none")
         for mapping in videoMappings:
             validate(instance=mapping, schema=videoEventSchema)
             motion = mapping.get("motion", "none")
@@ -49,8 +78,8 @@ async def get_video_mapping(videoFileName):
                 video_mapper.save_mapping(videoFileName, data)
                 continue
             mapping["motion"] = motion
-            motion_data = load_motion(motion)
-            validate(instance=motion_data, schema=motionSchema)
+            motion_data = metadata.get(motion, {})
+            validate(instance=motion_data, schema=motionMetadataSchema)
             mapping["magnitude"] = motion_data["magnitude"]
             mapping["color"] = motion_data["color"]
             mapping["duration"] = motion_data["duration"]
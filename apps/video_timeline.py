@@ -0,0 +1,195 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+import logging
+import time
+
+logger = logging.getLogger("MotionBridge")
+
+LOOKAHEAD = 0.05
+SEEK_THRESHOLD = 0.25
+DRIFT_GAIN = 0.2
+
+class VideoTimeline:
+    """
+    Server-side scheduler of the events of one video mapping.
+
+    Events are kept sorted by timeOffset, so a seek is a binary search. The
+    playback position is extrapolated from the last clock update of the
+    client (position, rate, playing) on the monotonic server clock, and
+    events are dispatched up to LOOKAHEAD ahead of their time with the exact
+    start time on the bridge clock, so that neither timer jitter nor
+    websocket latency of the browser lands on them.
+
+    Clock reports within SEEK_THRESHOLD of the extrapolated position only
+    pull it by DRIFT_GAIN of the difference, which smooths out the latency
+    jitter of the reports; larger differences are treated as a seek. Events
+    are dispatched at most once until the next seek, even when a correction
+    moves the position backwards.
+
+    When the mapping is loaded with a rendered force track, no events are
+    dispatched. Instead the player is told to stream the track from the
+    current position on every play, pause, seek and rate change.
+    """
+    def __init__(self, dispatch, stream=None, lookahead=LOOKAHEAD, clock=time.monotonic, wall_clock=time.time):
+        self.dispatch = dispatch
+        self.stream = stream
+        self.lookahead = lookahead
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.name = None
+        self.track = None
+        self.resync = False
+        self.events = []
+        self.times = []
+        self.next_index = 0
+        self.playing = False
+        self.rate = 1.0
+        self.anchor_position = 0.0
+        self.anchor_time = clock()
+        self.wake = asyncio.Event()
+        self.task = None
+        self.dispatched = 0
+        self.late = 0
+        self.max_lateness = 0.0
+        self.seeks = 0
+        self.corrections = 0
+        self.last_drift = 0.0
+
+    def load(self, mapping, track=None):
+        self.name = mapping["videoFileName"]
+        self.track = track
+        self.events = sorted(mapping["videoEvents"], key=lambda event: event["timeOffset"])
+        self.times = [event["timeOffset"] for event in self.events]
+        self.seek(self.position())
+
+    def position(self, now=None):
+        if not self.playing:
+            return self.anchor_position
+        if now is None:
+            now = self.clock()
+        return self.anchor_position + (now - self.anchor_time) * self.rate
+
+    def _anchor(self, position, now):
+        self.anchor_position = max(position, 0.0)
+        self.anchor_time = now
+        self.wake.set()
+
+    def seek(self, position):
+        self._anchor(position, self.clock())
+        self.next_index = bisect_left(self.times, self.anchor_position)
+        self.seeks += 1
+        self.resync = True
+
+    def play(self, position=None, rate=None):
+        if rate is not None:
+            self.rate = rate
+        if position is None:
+            self._anchor(self.position(), self.clock())
+        else:
+            self.seek(position)
+        self.playing = True
+        self.resync = True
+
+    def pause(self, position=None):
+        self._anchor(self.position(), self.clock())
+        self.playing = False
+        self.resync = True
+        if position is not None:
+            self.seek(position)
+
+    def set_rate(self, rate, position=None):
+        self._anchor(self.position(), self.clock())
+        self.rate = rate
+        self.resync = True
+        if position is not None:
+            self.report(position)
+
+    def report(self, position):
+        """Correct the extrapolated position by a position reported by the client."""
+        now = self.clock()
+        drift = position - self.position(now)
+        self.last_drift = drift
+        if abs(drift) > SEEK_THRESHOLD or (not self.playing and drift):
+            self.seek(position)
+        elif self.playing:
+            self._anchor(self.position(now) + drift * DRIFT_GAIN, now)
+            self.corrections += 1
+
+    def due(self):
+        """
+        Events that are due within the lookahead, as (event, delay) with the
+        delay in seconds of real time from now, negative if late.
+        """
+        if not self.playing or self.track is not None:
+            return []
+        position = self.position()
+        horizon = position + self.lookahead * self.rate
+        end = bisect_right(self.times, horizon, self.next_index)
+        due = []
+        for index in range(self.next_index, end):
+            due.append((self.events[index], (self.times[index] - position) / self.rate))
+        self.next_index = end
+        return due
+
+    def time_to_next(self):
+        """Real time until the next event enters the lookahead, None if nothing is scheduled."""
+        if not self.playing or self.track is not None or self.next_index >= len(self.times):
+            return None
+        return max((self.times[self.next_index] - self.position()) / self.rate - self.lookahead, 0.0)
+
+    async def _stream_track(self):
+        self.resync = False
+        start_time = self.wall_clock() + self.lookahead
+        if self.playing:
+            position = self.position() + self.lookahead * self.rate
+            await self.stream(self.track, position, self.rate, start_time)
+        else:
+            await self.stream(None, self.position(), self.rate, start_time)
+
+    async def _run(self):
+        while True:
+            self.wake.clear()
+            if self.track is not None and self.resync:
+                try:
+                    await self._stream_track()
+                except Exception as e:
+                    logger.info(f"Failed to stream track of {self.name}: {e}")
+            for event, delay in self.due():
+                if delay < 0:
+                    self.late += 1
+                    self.max_lateness = max(self.max_lateness, -delay)
+                try:
+                    await self.dispatch(event, self.wall_clock() + max(delay, 0.0))
+                    self.dispatched += 1
+                except Exception as e:
+                    logger.info(f"Failed to dispatch video event {event.get('id')}: {e}")
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.time_to_next())
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def get_stats(self):
+        return {
+            "video": self.name,
+            "track": self.track,
+            "events": len(self.events),
+            "next_index": self.next_index,
+            "playing": self.playing,
+            "position": self.position(),
+            "rate": self.rate,
+            "dispatched": self.dispatched,
+            "late": self.late,
+            "max_lateness_ms": self.max_lateness * 1000,
+            "seeks": self.seeks,
+            "corrections": self.corrections,
+            "last_drift_ms": self.last_drift * 1000,
+        }
@@ -0,0 +1,66 @@
+# benchmarks/bench_input_channel.py
+#
+# Messages per second through the /input websocket of MotionBridge, for haptics
+# and video event messages, and the cost of validating each of them with
+# jsonschema.validate versus the cached validators of apps.schema.
+# send_motion is replaced by a counter so that no MotionPlayer is needed, and
+# bridge logging is silenced. Run from the repository root:
+#   python -m benchmarks.bench_input_channel
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import jsonschema
+from apps import motion_bridge
+from apps.schema import hapticsInputSchema, videoEventSchema, validate
+
+HAPTICS_MESSAGE = {"program": "Animal Well.exe", "largeMotor": 249, "smallMotor": 0}
+VIDEO_MESSAGE = {
+    "id": 1, "motion": "bench", "behavior": "replace", "scale": 0.5, "fallback": 0,
+    "timeOffset": 1.5, "duration": 1.0, "magnitude": 500, "color": "#ff0000",
+}
+
+def bench_validate(validate_fn, message, schema, n):
+    """Validations per second."""
+    start = time.perf_counter()
+    for _ in range(n):
+        validate_fn(instance=message, schema=schema)
+    return n / (time.perf_counter() - start)
+
+async def bench_channel(message, n):
+    """Messages per second from the first send until send_motion saw the last one."""
+    handled = 0
+    done = asyncio.Event()
+
+    async def count_motion(*args, **kwargs):
+        nonlocal handled
+        handled += 1
+        if handled == n:
+            done.set()
+
+    motion_bridge.send_motion = count_motion
+    payload = json.dumps(message)
+    client = motion_bridge.bridge.test_client()
+    async with client.websocket("/input?client=bench") as ws:
+        start = time.perf_counter()
+        for _ in range(n):
+            await ws.send(payload)
+        await asyncio.wait_for(done.wait(), timeout=60)
+        elapsed = time.perf_counter() - start
+    return n / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--messages", type=int, default=20000, help="Messages per measurement")
+    args = parser.parse_args()
+    logging.getLogger("MotionBridge").setLevel(logging.WARNING)
+
+    print(f"{'message':>8} {'jsonschema/s':>14} {'cached/s':>12} {'channel msgs/s':>16}")
+    for label, message, schema in [("haptics", HAPTICS_MESSAGE, hapticsInputSchema),
+                                   ("video", VIDEO_MESSAGE, videoEventSchema)]:
+        baseline = bench_validate(jsonschema.validate, message, schema, args.messages // 10)
+        cached = bench_validate(validate, message, schema, args.messages)
+        channel = asyncio.run(bench_channel(message, args.messages))
+        print(f"{label:>8} {baseline:>14.0f} {cached:>12.0f} {channel:>16.0f}")
@@ -0,0 +1,45 @@
+# benchmarks/bench_motion_validation.py
+#
+# Cost of validating a motion payload of growing length with jsonschema.validate
+# versus apps.schema.validate, which checks the shapes as NumPy arrays.
+# Run from the repository root: python -m benchmarks.bench_motion_validation
+
+import argparse
+import json
+import time
+import jsonschema
+import numpy as np
+from apps.schema import motionSchema, validate
+from player.motion_store import SHAPE_KEYS
+
+DURATIONS = [1, 10, 60]
+
+def make_motion(samples):
+    motion = {
+        "name": "bench",
+        "magnitude": 500,
+        "color": "#ff0000",
+        "shortDisplayName": "bench",
+        "longDisplayName": "bench",
+    }
+    for key in SHAPE_KEYS:
+        motion[key] = np.random.uniform(-1, 1, samples).tolist()
+    return json.loads(json.dumps(motion))
+
+def bench(validate_fn, motion, repeat):
+    """Average cost of one validation in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        validate_fn(instance=motion, schema=motionSchema)
+    return (time.perf_counter() - start) / repeat * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="Validations per measurement")
+    args = parser.parse_args()
+    print(f"{'seconds':>8} {'samples':>8} {'jsonschema ms':>14} {'vectorized ms':>14}")
+    for seconds in DURATIONS:
+        motion = make_motion(seconds * 100)
+        baseline = bench(jsonschema.validate, motion, max(1, args.repeat // 10))
+        vectorized = bench(validate, motion, args.repeat)
+        print(f"{seconds:>8} {seconds * 100 * len(SHAPE_KEYS):>8} {baseline:>14.2f} {vectorized:>14.2f}")
@@ -0,0 +1,48 @@
+# benchmarks/bench_player_tick.py
+#
+# Per-tick cost of MotionPlayer.get_next_buffer_command for growing buffer sizes.
+# Run from the repository root: python -m benchmarks.bench_player_tick
+
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+from player.motion_player import MotionPlayer, MotionMode
+
+BUFFER_SIZES = [1000, 5000, 20000, 100000, 500000]
+
+def bench_tick(buffer_size, ticks):
+    """Average cost of a tick that plays a queued sample, in microseconds."""
+    player = MotionPlayer(buffer_size=buffer_size)
+    player.set_mode(MotionMode.EVENT)
+    shapes = np.random.uniform(-1, 1, (player.capacity, 4))
+    motion_data = {
+        "name": "bench",
+        "flShape": shapes[:, 0],
+        "frShape": shapes[:, 1],
+        "rlShape": shapes[:, 2],
+        "rrShape": shapes[:, 3],
+    }
+
+    elapsed = 0
+    remaining = ticks
+    while remaining > 0:
+        player.handle_motion_data(motion_data, "replace", 1.0)
+        n = min(remaining, player.capacity)
+        start = time.perf_counter()
+        for _ in range(n):
+            player.update()
+        elapsed += time.perf_counter() - start
+        remaining -= n
+    return elapsed / ticks * 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--ticks", type=int, default=20000, help="Ticks per buffer size")
+    args = parser.parse_args()
+    print(f"{'buffer_size':>12} {'us/tick':>10}")
+    for size in BUFFER_SIZES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cost = bench_tick(size, args.ticks)
+        print(f"{size:>12} {cost:>10.2f}")
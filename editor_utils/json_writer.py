@@ -0,0 +1,101 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("JsonWriter")
+
+WRITE_DELAY = 0.5
+
+class JsonWriter:
+    """
+    Debounced write-behind of JSON files on a background thread.
+
+    write() only takes a compact snapshot of the data, so the caller can keep
+    mutating it. The file is written WRITE_DELAY after the first write of a
+    batch, with the newest snapshot, indented like before, through a
+    temporary file that replaces the original atomically. Pending files are
+    flushed by flush() and at interpreter exit.
+    """
+    def __init__(self, delay=WRITE_DELAY):
+        self.delay = delay
+        self.cond = threading.Condition()
+        # held while files are written so that an older snapshot can never
+        # replace a newer one written by a concurrent flush()
+        self.io_lock = threading.Lock()
+        self.pending = {}
+        self.deadline = None
+        self.thread = None
+        self.running = True
+        self.writes = 0
+        self.snapshots = 0
+
+    def write(self, path, data):
+        snapshot = json.dumps(data)
+        with self.cond:
+            self.pending[str(path)] = snapshot
+            self.snapshots += 1
+            if self.deadline is None:
+                self.deadline = time.monotonic() + self.delay
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="JsonWriter", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+    def _take_pending(self):
+        pending = self.pending
+        self.pending = {}
+        self.deadline = None
+        return pending
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and (self.deadline is None or time.monotonic() < self.deadline):
+                    timeout = None if self.deadline is None else self.deadline - time.monotonic()
+                    self.cond.wait(timeout)
+                if not self.running:
+                    return
+            self.flush()
+
+    def _write_files(self, pending):
+        for path, snapshot in pending.items():
+            try:
+                self._write_atomic(path, json.dumps(json.loads(snapshot), indent=4))
+                self.writes += 1
+            except Exception as e:
+                logger.error(f"Failed to write {path}: {e}")
+
+    @staticmethod
+    def _write_atomic(path, text):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        """Write every pending file now, on the calling thread."""
+        with self.io_lock:
+            with self.cond:
+                pending = self._take_pending()
+            self._write_files(pending)
+
+    def shutdown(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.flush()
+
+    def get_stats(self):
+        return {
+            "pending": len(self.pending),
+            "snapshots": self.snapshots,
+            "writes": self.writes,
+        }
+
+json_writer = JsonWriter()
+atexit.register(json_writer.shutdown)
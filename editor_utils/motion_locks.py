@@ -1,4 +1,5 @@
 import json
+from editor_utils.json_writer import json_writer
 
 class MotionLocks:
     def __init__(self, lock_path="editor_utils/editable_motions.json"):
@@ -10,8 +11,7 @@ class MotionLocks:
             self.editable_motions = json.load(f)
     
     def save_locks(self):
-        with open(self.lock_path, "w") as f:
-            json.dump(self.editable_motions, f, indent=4)
+        json_writer.write(self.lock_path, self.editable_motions)
     
     def is_motion_locked(self, motion_name):
         if motion_name == "none":
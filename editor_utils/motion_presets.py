@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+from editor_utils.json_writer import json_writer
 
 MOTION_TYPES = ["sine", "ramp", "impulse", "min_jerk", "twin_peak", "white_noise", "bezier_curve", "composite"]
 
@@ -14,8 +15,7 @@ class MotionPresets:
     
     def save_mapping(self):
         sorted_dict = dict(sorted(self.mapping.items()))
-        with open(self.preset_json_path, "w") as f:
-            json.dump(sorted_dict, f, indent=4)
+        json_writer.write(self.preset_json_path, sorted_dict)
         self.mapping = sorted_dict
     
     def get_all_presets(self):
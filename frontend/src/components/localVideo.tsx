@@ -1,15 +1,36 @@
 import { useState, useRef, useEffect } from "react";
 import { VideoProps } from "../shared/video.map.type";
+import { useVideoTimeline } from "../hooks/useVideoTimeline";
 
 const LocalVideo = ({
   videoFileName,
   setVideoDuration,
   videoChangeEvent,
   setUpdateVideo,
+  mappingRevision,
+  streamTrack,
+  setTimelineConnected,
 }: VideoProps) => {
   const [lastTimeOffset, setLastTimeOffset] = useState<number | null>(null);
   const [lastIsPlaying, setLastIsPlaying] = useState(false);
   const videoTag = useRef<HTMLVideoElement | null>(null);
+  const timelineConnected = useVideoTimeline(
+    videoFileName,
+    () =>
+      videoTag.current && {
+        position: videoTag.current.currentTime,
+        isPlaying: !videoTag.current.paused,
+        rate: videoTag.current.playbackRate,
+      },
+    streamTrack,
+    mappingRevision
+  );
+  useEffect(() => {
+    setTimelineConnected?.(timelineConnected);
+    return () => {
+      setTimelineConnected?.(false);
+    };
+  }, [timelineConnected]);
   const mountEvent = (tag: HTMLVideoElement | null): void => {
     videoTag.current = tag;
     if (videoTag.current !== null) {
@@ -7,6 +7,9 @@ const Video = ({
   setVideoDuration,
   videoChangeEvent,
   setUpdateVideo,
+  mappingRevision,
+  streamTrack,
+  setTimelineConnected,
 }: VideoProps) => {
   if (videoFileName.toLowerCase().endsWith(".youtube")) {
     return (
@@ -15,6 +18,9 @@ const Video = ({
         setVideoDuration={setVideoDuration}
         videoChangeEvent={videoChangeEvent}
         setUpdateVideo={setUpdateVideo}
+        mappingRevision={mappingRevision}
+        streamTrack={streamTrack}
+        setTimelineConnected={setTimelineConnected}
       />
     );
   } else {
@@ -24,6 +30,9 @@ const Video = ({
         setVideoDuration={setVideoDuration}
         videoChangeEvent={videoChangeEvent}
         setUpdateVideo={setUpdateVideo}
+        mappingRevision={mappingRevision}
+        streamTrack={streamTrack}
+        setTimelineConnected={setTimelineConnected}
       />
     );
   }
@@ -60,6 +60,9 @@ const VideoMappingEditor = ({
   const [selectedEvent, setSelectedEvent] = useState<VideoEvent | null>(null);
   const [timelineScale, setTimelineScale] = useState<number>(128);
   const [dragEnabled, setDragEnabled] = useState<boolean>(false);
+  const [timelineConnected, setTimelineConnected] = useState<boolean>(false);
+  const [streamTrack, setStreamTrack] = useState<boolean>(false);
+  const [mappingRevision, setMappingRevision] = useState<number>(0);
   const [newVideoName, setNewVideoName] = useState<string>(
     trimExtension(videoFileName)
   );
@@ -102,11 +105,14 @@ const VideoMappingEditor = ({
   }, [videoIsPlaying, videoEventsReady]);
 
   // Send event signal when reaching the next event in sequence
+  // While the video reports to /timeline, the bridge sends the events itself
   useEffect(() => {
     if (videoEventQueue.current.length > 0) {
       if (editorTimeOffset >= videoEventQueue.current[0].timeOffset) {
         const nextMotion = videoEventQueue.current[0];
-        sendMessage(JSON.stringify(nextMotion));
+        if (!timelineConnected) {
+          sendMessage(JSON.stringify(nextMotion));
+        }
         setLastEvent?.(nextMotion.motion);
         videoEventQueue.current.shift();
       }
@@ -209,6 +215,7 @@ const VideoMappingEditor = ({
     const res = await postVideoMapping(data);
     if (res.data) {
       setMessage(res.data.message);
+      setMappingRevision(mappingRevision + 1);
     }
     if (res.errorMsg) {
       setMessage(res.errorMsg.error);
@@ -348,6 +355,11 @@ const VideoMappingEditor = ({
   ) => {
     setDragEnabled(!!event.target.checked);
   };
+  const streamTrackChangeEvent = (
+    event: React.ChangeEvent<HTMLInputElement>
+  ) => {
+    setStreamTrack(!!event.target.checked);
+  };
   const timelineSelectEvent = (videoEvent: VideoEvent | null) => {
     setSelectedEvent(videoEvent);
     setNextMotionType({
@@ -473,6 +485,9 @@ const VideoMappingEditor = ({
           setVideoDuration={setVideoDuration}
           videoChangeEvent={videoChangeEvent}
           setUpdateVideo={setUpdateVideo}
+          mappingRevision={mappingRevision}
+          streamTrack={streamTrack}
+          setTimelineConnected={setTimelineConnected}
         />
       </div>
       {videoEventsReady ? (
@@ -506,6 +521,15 @@ const VideoMappingEditor = ({
             <span style={{ verticalAlign: -2, marginLeft: 5 }}>
               Enable Click and Drag
             </span>
+            <input
+              type="checkbox"
+              checked={streamTrack}
+              onChange={streamTrackChangeEvent}
+              style={{ marginLeft: 15 }}
+            />
+            <span style={{ verticalAlign: -2, marginLeft: 5 }}>
+              Stream Force Track
+            </span>
           </p>
           {selectedEvent !== null && (
             <>
@@ -6,17 +6,38 @@ import {
   YouTubePlayer,
   YouTubeEvent,
 } from "../shared/video.map.type";
+import { useVideoTimeline } from "../hooks/useVideoTimeline";
 
 const YoutubeVideo = ({
   videoFileName,
   setVideoDuration,
   videoChangeEvent,
   setUpdateVideo,
+  mappingRevision,
+  streamTrack,
+  setTimelineConnected,
 }: VideoProps) => {
   const [videoId, setVideoId] = useState<string | null>(null);
   const [lastTimeOffset, setLastTimeOffset] = useState<number | null>(null);
   const [lastIsPlaying, setLastIsPlaying] = useState(false);
   const youtubeApi = useRef<YouTubePlayer | null>(null);
+  const timelineConnected = useVideoTimeline(
+    videoFileName,
+    () =>
+      youtubeApi.current && {
+        position: youtubeApi.current.getCurrentTime(),
+        isPlaying: youtubeApi.current.getPlayerState() === 1,
+        rate: youtubeApi.current.getPlaybackRate(),
+      },
+    streamTrack,
+    mappingRevision
+  );
+  useEffect(() => {
+    setTimelineConnected?.(timelineConnected);
+    return () => {
+      setTimelineConnected?.(false);
+    };
+  }, [timelineConnected]);
   useEffect(() => {
     if (videoId !== null) {
       return;
@@ -0,0 +1,141 @@
+import { useEffect, useRef, useState } from "react";
+
+export interface Playback {
+  position: number; // seconds
+  isPlaying: boolean;
+  rate: number;
+}
+
+const POLL_INTERVAL = 50; // ms
+const CLOCK_INTERVAL = 250; // ms between clock reports while playing
+// jumps further from the expected position are reported as seeks,
+// same threshold as the bridge
+const SEEK_THRESHOLD = 0.25;
+const PAUSED_SEEK_THRESHOLD = 0.01;
+const MIN_RATE = 0.0625;
+const MAX_RATE = 16;
+
+// Reports the playback of a video to the /timeline channel of the bridge,
+// which then schedules the events of the saved mapping of the video itself.
+// Returns whether the mapping is loaded there, until then the caller has to
+// send the events over /input.
+export function useVideoTimeline(
+  videoFileName: string,
+  getPlayback: () => Playback | null,
+  track = false,
+  revision = 0
+) {
+  const socketRef = useRef<WebSocket | null>(null);
+  const playbackRef = useRef(getPlayback);
+  playbackRef.current = getPlayback;
+  const lastSent = useRef<(Playback & { time: number }) | null>(null);
+  const loading = useRef(false);
+  const loaded = useRef(false);
+  const [isOpen, setIsOpen] = useState(false);
+  const [isLoaded, setIsLoaded] = useState(false);
+
+  const send = (command: string, fields: object = {}) => {
+    const socket = socketRef.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ command, ...fields }));
+    }
+  };
+  const setLoaded = (value: boolean) => {
+    loaded.current = value;
+    setIsLoaded(value);
+  };
+
+  useEffect(() => {
+    const socket = new WebSocket("ws://localhost:6789/timeline?client=video");
+    socketRef.current = socket;
+
+    socket.onopen = () => {
+      setIsOpen(true);
+    };
+
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.command === "loaded") {
+        loading.current = false;
+        lastSent.current = null; // report the current playback again
+        setLoaded(true);
+      } else if (data.error) {
+        console.error("Timeline error:", data.error);
+        if (loading.current) {
+          // the bridge keeps any previous mapping, stop it
+          loading.current = false;
+          send("pause");
+          setLoaded(false);
+        }
+      }
+    };
+
+    socket.onclose = () => {
+      setIsOpen(false);
+      setLoaded(false);
+    };
+
+    socket.onerror = (err) => {
+      console.error("WebSocket error:", err);
+    };
+
+    return () => {
+      socket.close();
+    };
+  }, []);
+
+  // (re)load after the video changes or its mapping is saved
+  useEffect(() => {
+    if (!isOpen || !videoFileName) {
+      return;
+    }
+    loading.current = true;
+    send("load", { videoFileName, track });
+  }, [isOpen, videoFileName, track, revision]);
+
+  useEffect(() => {
+    const interval = setInterval(() => {
+      if (!loaded.current) {
+        return;
+      }
+      const playback = playbackRef.current();
+      if (playback === null) {
+        return;
+      }
+      const now = performance.now();
+      const { isPlaying } = playback;
+      const position = Math.max(playback.position, 0);
+      const rate = Math.min(Math.max(playback.rate, MIN_RATE), MAX_RATE);
+      const report = (command: string, fields: object) => {
+        send(command, fields);
+        lastSent.current = { position, isPlaying, rate, time: now };
+      };
+      const last = lastSent.current;
+      if (last === null || isPlaying !== last.isPlaying) {
+        report(
+          isPlaying ? "play" : "pause",
+          isPlaying ? { position, rate } : { position }
+        );
+        return;
+      }
+      if (rate !== last.rate) {
+        report("rate", { rate, position });
+        return;
+      }
+      const expected = isPlaying
+        ? last.position + ((now - last.time) / 1000) * last.rate
+        : last.position;
+      const threshold = isPlaying ? SEEK_THRESHOLD : PAUSED_SEEK_THRESHOLD;
+      if (Math.abs(position - expected) > threshold) {
+        report("seek", { position });
+      } else if (isPlaying && now - last.time >= CLOCK_INTERVAL) {
+        report("clock", { position });
+      }
+    }, POLL_INTERVAL);
+    return () => {
+      clearInterval(interval);
+    };
+  }, []);
+
+  return isLoaded;
+}
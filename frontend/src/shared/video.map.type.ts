@@ -69,6 +69,9 @@ export interface VideoProps {
   setUpdateVideo: (
     updateFn: (timeOffset: number, isPlaying: boolean) => void
   ) => void;
+  mappingRevision?: number; // changes whenever the mapping is saved
+  streamTrack?: boolean;
+  setTimelineConnected?: (connected: boolean) => void;
 }
 
 export interface CarProps {
@@ -140,6 +143,7 @@ export interface YouTubePlayer {
   getCurrentTime(): number;
   getPlayerState(): number;
   getDuration(): number;
+  getPlaybackRate(): number;
   seekTo(seconds: number): void;
   playVideo(): void;
   pauseVideo(): void;
@@ -1,6 +1,5 @@
 import numpy as np
-import json
-import os
+from player.motion_store import read_motion
 from .helper_generate_random_color import helper_generate_random_color
 
 def generate_composite_motion(src_composition, motion_dir="motions/"):
@@ -21,7 +20,7 @@ def generate_composite_motion(src_composition, motion_dir="motions/"):
                     ... 
                     ]
                 }
-        motion_dir (str): Path to directory with pre-built motion JSON files.
+        motion_dir (str): Path to directory with pre-built motions (JSON or binary).
 
     Returns:
         dict: builtMotion containing combined actuator waveforms and metadata.
@@ -42,9 +41,9 @@ def generate_composite_motion(src_composition, motion_dir="motions/"):
     current_time = 0
     
     for i, motion in enumerate(motions):
-        filepath = os.path.join(motion_dir, motion['motionRef'] + '.json')
-        with open(filepath, 'r') as f:
-            built_motion_temp = json.load(f)
+        built_motion_temp = read_motion(motion['motionRef'], motion_dir, as_lists=False)
+        if built_motion_temp is None:
+            raise FileNotFoundError(f"Motion {motion['motionRef']} not found")
 
         mag = motion.get('magnitudeOverride', built_motion_temp['magnitude'])
         duration = len(built_motion_temp['flShape']) / Fs
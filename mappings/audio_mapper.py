@@ -2,6 +2,7 @@
 # mapping/audio_mapper.py
 
 import json
+from editor_utils.json_writer import json_writer
 from pathlib import Path
 
 AUDIO_PATH = "public/audios"
@@ -28,8 +29,7 @@ class AudioMapper:
             self.mapping = json.load(f)
 
     def save_mapping(self):
-        with open(self.mapping_path, "w") as f:
-            json.dump(self.mapping, f, indent=4)
+        json_writer.write(self.mapping_path, self.mapping)
     
     def update_mapping(self, data):
         self.mapping = data
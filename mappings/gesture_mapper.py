@@ -1,26 +1,45 @@
 # mapping/gesture_mapper.py
 
 import json
-from player.motion_player import BEHAVIORS, load_motion_lib
+from collections import namedtuple
+from editor_utils.json_writer import json_writer
+from player.motion_player import BEHAVIORS, motion_in_lib
+
+GestureRecord = namedtuple("GestureRecord", ["motion", "behavior", "frames", "fallback"])
+EMPTY_RECORD = GestureRecord("none", "disable", 3, 0)
 
 class GestureMapper:
+    """
+    Maps recognized gestures to motions. Copy-on-write like HapticsMapper:
+    edits publish a new mapping and gesture lookup only once they are valid.
+    """
     def __init__(self, path="mappings/gesture2motion.json"):
         self.mapping_path = path
         self.load_mapping()
 
+    def _publish(self, mapping):
+        lookup = {
+            gesture: GestureRecord(
+                data.get("motion", "none"), data.get("behavior", "disable"),
+                data.get("frames", 3), data.get("fallback", 0)
+            )
+            for gesture, data in mapping.items()
+        }
+        self.mapping = mapping
+        self.lookup = lookup
+
     def load_mapping(self):
         with open(self.mapping_path, "r") as f:
-            self.mapping = json.load(f)
+            self._publish(json.load(f))
 
     def save_mapping(self):
-        with open(self.mapping_path, "w") as f:
-            json.dump(self.mapping, f, indent=4)
+        json_writer.write(self.mapping_path, self.mapping)
     
     def get_mapping(self):
         result = []
         for gesture, data in self.mapping.items():
             motion = data.get("motion")
-            if motion not in load_motion_lib():
+            if not motion_in_lib(motion):
                 motion = "none"
             behavior = data.get("behavior")
             if behavior not in BEHAVIORS:
@@ -38,21 +57,37 @@ class GestureMapper:
         return result
 
     def map_gesture(self, gesture):
-        data = self.mapping.get(gesture, {})
-        motion = data.get("motion", "none")
-        behavior = data.get("behavior", "disable")
-        frames = data.get("frames", 3)
-        fallback = data.get("fallback", 0)
-        return motion, behavior, frames, fallback
-    
+        return self.lookup.get(gesture, EMPTY_RECORD)
+
     def update_mapping(self, gesture, motion, behavior, frames, fallback):
-        data = self.mapping.get(gesture, {})
-        if not data:
-            return "gesture"
-        if motion not in load_motion_lib():
-            return "motion"
-        data["motion"] = motion
-        data["behavior"] = behavior
-        data["frames"] = frames
-        data["fallback"] = fallback
-        return None
\ No newline at end of file
+        error, _ = self.update_mappings([{
+            "gesture": gesture,
+            "motion": motion,
+            "behavior": behavior,
+            "frames": frames,
+            "fallback": fallback,
+        }])
+        return error
+
+    def update_mappings(self, entries):
+        """
+        Apply a batch of gesture entries. Returns the name of the first
+        invalid field and its gesture, or (None, None) once the whole batch
+        is published.
+        """
+        mapping = dict(self.mapping)
+        for entry in entries:
+            gesture = entry["gesture"]
+            data = mapping.get(gesture, {})
+            if not data:
+                return "gesture", gesture
+            if not motion_in_lib(entry["motion"]):
+                return "motion", gesture
+            data = dict(data)
+            data["motion"] = entry["motion"]
+            data["behavior"] = entry["behavior"]
+            data["frames"] = entry["frames"]
+            data["fallback"] = entry["fallback"]
+            mapping[gesture] = data
+        self._publish(mapping)
+        return None, None
\ No newline at end of file
@@ -1,22 +1,125 @@
-
 # mapping/haptics_mapper.py
 
 import json
-from player.motion_player import load_motion_lib, BEHAVIORS
+import math
+from collections import namedtuple
+from editor_utils.json_writer import json_writer
+from player.motion_player import motion_in_lib, BEHAVIORS
+
+HapticsRecord = namedtuple("HapticsRecord", ["motion", "behavior", "scale", "fallback"])
+EMPTY_RECORD = HapticsRecord(None, None, None, None)
+
+def parse_haptics(haptics):
+    large, small = haptics.split(":")
+    return int(large), int(small)
+
+def is_mapped(record):
+    return record.motion not in (None, "none")
+
+class HapticsGrid:
+    """
+    Mapped haptics entries of one program bucketed on a grid over the
+    (largeMotor, smallMotor) plane, with cells as wide as the match radius,
+    so a nearest neighbor query only visits the 3x3 cells around a point.
+    """
+    def __init__(self, radius):
+        self.radius = radius
+        self.cells = {}
+
+    def add(self, large, small, record):
+        cell = (large // self.radius, small // self.radius)
+        self.cells.setdefault(cell, []).append((large, small, record))
+
+    def neighbors(self, large, small):
+        """Entries within the radius as (distance, record)."""
+        cx, cy = large // self.radius, small // self.radius
+        found = []
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                for l, s, record in self.cells.get((x, y), ()):
+                    distance = math.hypot(l - large, s - small)
+                    if distance <= self.radius:
+                        found.append((distance, record))
+        return found
 
 class HapticsMapper:
-    def __init__(self, path="mappings/haptics2motion.json"):
+    """
+    Maps (program, haptics) pairs to motions.
+
+    With a match radius, a pair without a mapped motion resolves to the
+    nearest mapped pair of the same program within that radius, optionally
+    with its scale interpolated by inverse distance over the neighbors that
+    map to the same motion.
+
+    The mapping is copy-on-write: edits build a new mapping, replacing the
+    changed entries instead of mutating them, and publish it together with
+    per-program lookups of haptics to a resolved HapticsRecord only once the
+    whole edit is valid. Only the lookups and grids of the edited programs
+    are rebuilt. Event handlers read the published lookups, so they never
+    see a half-applied edit.
+    """
+    def __init__(self, path="mappings/haptics2motion.json", radius=0, interpolate=False):
         self.mapping_path = path
+        self.radius = radius
+        self.interpolate = interpolate
+        self.unseen = {}
         self.load_mapping()
 
+    def _build_program(self, haptics):
+        """Lookup of haptics to HapticsRecord of one program, and its grid if matching by radius."""
+        lookup = {}
+        grid = None
+        for hid, props in haptics.items():
+            record = HapticsRecord(
+                props.get("motion"), props.get("behavior"), props.get("scale"), props.get("fallback", 0)
+            )
+            lookup[hid] = record
+            if self.radius > 0 and is_mapped(record):
+                try:
+                    large, small = parse_haptics(hid)
+                except ValueError:
+                    continue
+                if grid is None:
+                    grid = HapticsGrid(self.radius)
+                grid.add(large, small, record)
+        return lookup, grid
+
+    def _publish(self, mapping, programs=None):
+        """
+        Publish mapping, rebuilding the lookups and grids of the given changed
+        programs only and sharing those of the others with the previous
+        snapshot. Without programs, every program is rebuilt.
+        """
+        if programs is None:
+            lookups, grids = {}, {}
+            programs = mapping
+        else:
+            lookups, grids = dict(self.lookups), dict(self.grids)
+        for program in programs:
+            lookups.pop(program, None)
+            grids.pop(program, None)
+            if program in mapping:
+                lookup, grid = self._build_program(mapping[program])
+                lookups[program] = lookup
+                if grid is not None:
+                    grids[program] = grid
+        self.mapping = mapping
+        self.lookups = lookups
+        self.grids = grids
+
+    def set_matching(self, radius=0, interpolate=False):
+        """Match unmapped pairs to mapped ones within radius, 0 for exact matches only."""
+        self.radius = radius
+        self.interpolate = interpolate
+        self._publish(self.mapping)
+
     def load_mapping(self):
         with open(self.mapping_path, "r") as f:
-            self.mapping = json.load(f)
+            self._publish(json.load(f))
 
     def save_mapping(self):
-        with open(self.mapping_path, "w") as f:
-            json.dump(self.mapping, f, indent=4)
-    
+        json_writer.write(self.mapping_path, self.mapping)
+
     def get_mapping(self):
         result = []
         for program, haptics in self.mapping.items():
@@ -24,7 +127,7 @@ class HapticsMapper:
             for hid, props in haptics.items():
                 entry = {"haptics": hid}
                 entry.update(props)
-                if entry.get("motion") not in load_motion_lib():
+                if not motion_in_lib(entry.get("motion")):
                     entry["motion"] = "none"
                 if entry.get("behavior") not in BEHAVIORS:
                     entry["behavior"] = "replace"
@@ -38,52 +141,131 @@ class HapticsMapper:
 
     def get_program_list(self):
         return list(self.mapping.keys())
-    
+
     def to_haptics(self, largeMotor, smallMotor):
         return f"{largeMotor:03d}:{smallMotor:03d}"
 
     def add_mapping(self, program, haptics):
-        self.mapping.setdefault(program, {}).setdefault(haptics, {
+        if haptics in self.mapping.get(program, {}):
+            return
+        mapping = dict(self.mapping)
+        mapping[program] = dict(mapping.get(program, {}))
+        mapping[program][haptics] = {
             "motion": "none",
             "behavior": "replace",
             "scale": 0.5,
             "fallback": 0
-        })
-    
+        }
+        self._publish(mapping, [program])
+
     def update_mapping(self, program, haptics, motion, behavior, scale, fallback, alias=None):
-        if motion not in load_motion_lib():
-            return "motion"
-        
-        if behavior not in BEHAVIORS:
-            return "behavior"
-        
-        data = self.mapping.get(program, {}).get(haptics)
-        if not data:
-            return "haptics"
-        
-        data["motion"] = motion
-        data["behavior"] = behavior
-        data["scale"] = scale
-        data["fallback"] = fallback
-        if alias:
-            data["alias"] = alias
-        
-        return None
-    
+        error, _ = self.update_mappings(program, [{
+            "haptics": haptics,
+            "motion": motion,
+            "behavior": behavior,
+            "scale": scale,
+            "fallback": fallback,
+            "alias": alias,
+        }])
+        return error
+
+    def update_mappings(self, program, haptics_list):
+        """
+        Apply a batch of haptics entries of one program. Returns the name of
+        the first invalid field and the haptics it belongs to, or (None, None)
+        once the whole batch is published.
+        """
+        if not haptics_list:
+            return None, None
+        entries = dict(self.mapping.get(program, {}))
+        for item in haptics_list:
+            haptics = item["haptics"]
+            if not motion_in_lib(item["motion"]):
+                return "motion", haptics
+            if item["behavior"] not in BEHAVIORS:
+                return "behavior", haptics
+            data = entries.get(haptics)
+            if not data:
+                return "haptics", haptics
+            data = dict(data)
+            data["motion"] = item["motion"]
+            data["behavior"] = item["behavior"]
+            data["scale"] = item["scale"]
+            data["fallback"] = item["fallback"]
+            if item.get("alias"):
+                data["alias"] = item["alias"]
+            entries[haptics] = data
+
+        mapping = dict(self.mapping)
+        mapping[program] = entries
+        self._publish(mapping, [program])
+        return None, None
+
     def delete_program_entry(self, program):
-        return self.mapping.pop(program, None)
-    
+        if program not in self.mapping:
+            return None
+        mapping = dict(self.mapping)
+        result = mapping.pop(program)
+        self._publish(mapping, [program])
+        return result
+
     def delete_haptics_entry(self, program, haptics):
-        program_mapping = self.mapping.get(program, {})
+        program_mapping = dict(self.mapping.get(program, {}))
         result = program_mapping.pop(haptics, None)
-        if not program_mapping:
-            self.mapping.pop(program, None)
+        mapping = dict(self.mapping)
+        if program_mapping:
+            mapping[program] = program_mapping
+        else:
+            mapping.pop(program, None)
+        self._publish(mapping, [program])
         return result
 
-    def map_haptics(self, program, haptics):
-        data = self.mapping.get(program, {}).get(haptics)
-        motion = data.get("motion")
-        behavior = data.get("behavior")
-        scale = data.get("scale")
-        fallback = data.get("fallback", 0)
-        return motion, behavior, scale, fallback
\ No newline at end of file
+    def map_haptics(self, program, haptics, largeMotor=None, smallMotor=None):
+        record = self.lookups.get(program, {}).get(haptics, EMPTY_RECORD)
+        if is_mapped(record) or self.radius <= 0:
+            return record
+        grid = self.grids.get(program)
+        if grid is None:
+            return record
+        if largeMotor is None:
+            largeMotor, smallMotor = parse_haptics(haptics)
+        neighbors = grid.neighbors(largeMotor, smallMotor)
+        if not neighbors:
+            return record
+        distance, nearest = min(neighbors, key=lambda item: item[0])
+        if not self.interpolate or distance == 0:
+            return nearest
+        weights = [(1 / d, r.scale) for d, r in neighbors if r.motion == nearest.motion and d > 0]
+        scale = sum(w * s for w, s in weights) / sum(w for w, _ in weights)
+        return nearest._replace(scale=scale)
+
+    def register_unseen(self, program, haptics):
+        """
+        Queue an unseen pair for add_unseen. Returns True if the pair was not
+        queued yet.
+        """
+        if haptics in self.lookups.get(program, ()) or haptics in self.unseen.get(program, ()):
+            return False
+        self.unseen.setdefault(program, set()).add(haptics)
+        return True
+
+    def add_unseen(self):
+        """Add every queued unseen pair in one publish. Returns how many were added."""
+        unseen, self.unseen = self.unseen, {}
+        mapping = dict(self.mapping)
+        added = 0
+        for program, haptics_set in unseen.items():
+            entries = dict(mapping.get(program, {}))
+            for haptics in sorted(haptics_set):
+                if haptics not in entries:
+                    entries[haptics] = {
+                        "motion": "none",
+                        "behavior": "replace",
+                        "scale": 0.5,
+                        "fallback": 0
+                    }
+                    added += 1
+            mapping[program] = entries
+        if added:
+            self._publish(mapping, list(unseen))
+        return added
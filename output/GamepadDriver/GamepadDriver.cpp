@@ -347,15 +347,41 @@ int main(int argc, char* argv[])
 
         printf("Client connected!\n");
 
+        // Messages are newline terminated. Bytes are accumulated until a
+        // full line arrives and only the newest complete message of each
+        // recv is applied, so merged frames never replay stale forces.
+        // A client that sends no newlines is parsed per recv as before.
         char buffer[1024];
+        int used = 0;
         while (true)
         {
-            int len = recv(client, buffer, sizeof(buffer) - 1, 0);
+            int len = recv(client, buffer + used, sizeof(buffer) - 1 - used, 0);
             if (len <= 0)
                 break;
 
-            buffer[len] = '\0';
-            ParseAndSetRumble(buffer);
+            used += len;
+            buffer[used] = '\0';
+
+            char* lastEnd = nullptr;
+            for (char* p = buffer; (p = strchr(p, '\n')) != nullptr; p++)
+                lastEnd = p;
+
+            if (!lastEnd)
+            {
+                if (used < (int)sizeof(buffer) - 1 && !strchr(buffer, '}'))
+                    continue;
+                ParseAndSetRumble(buffer);
+                used = 0;
+                continue;
+            }
+
+            *lastEnd = '\0';
+            char* lastStart = strrchr(buffer, '\n');
+            ParseAndSetRumble(lastStart ? lastStart + 1 : buffer);
+
+            int rest = used - (int)(lastEnd + 1 - buffer);
+            memmove(buffer, lastEnd + 1, rest);
+            used = rest;
         }
 
         printf("Client disconnected\n");
@@ -16,6 +16,17 @@
 // Each value is interpreted as a servo angle in degrees (0–180).
 // On receiving a valid line, the sketch clamps the values to [0,180]
 // and updates the four servos to those angles.
+//
+// The sketch also accepts the compact binary protocol of ArduinoDriver
+// (protocol="binary"), 6 bytes per frame:
+//
+//   0xFF s1 s2 s3 s4 checksum
+//
+// where each angle is one byte in [0,180] and checksum is
+// (s1 + s2 + s3 + s4) % 255. Since neither angles nor checksum can be
+// 0xFF, a sync byte always starts a new frame, which lets the reader
+// resynchronize after a lost byte. Frames with a bad checksum are dropped.
+// Both protocols can be mixed on the same port.
 
 // Use names that don't clash with AVR macros
 const uint8_t SERVO1_PIN = 5;   // D5
@@ -43,22 +54,60 @@ void setup() {
   servo4.write(90);
 }
 
+const uint8_t SYNC_BYTE = 0xFF;
+const uint8_t FRAME_PAYLOAD = 5;  // four angles and the checksum
+
+uint8_t frame[FRAME_PAYLOAD];
+int8_t frameIndex = -1;  // -1 while not inside a binary frame
+char line[24];
+uint8_t lineLength = 0;
+
+void writeServos(int s1, int s2, int s3, int s4) {
+  servo1.write(constrain(s1, 0, 180));
+  servo2.write(constrain(s2, 0, 180));
+  servo3.write(constrain(s3, 0, 180));
+  servo4.write(constrain(s4, 0, 180));
+}
+
+void handleBinaryByte(uint8_t b) {
+  frame[frameIndex++] = b;
+  if (frameIndex < FRAME_PAYLOAD) {
+    return;
+  }
+  frameIndex = -1;
+  uint16_t sum = frame[0] + frame[1] + frame[2] + frame[3];
+  if (sum % 255 == frame[4]) {
+    writeServos(frame[0], frame[1], frame[2], frame[3]);
+  }
+}
+
 // Expect lines like:  90 45 120 0\n
-void loop() {
-  if (Serial.available()) {
-    String line = Serial.readStringUntil('\n');
+void handleTextByte(char c) {
+  if (c != '\n') {
+    if (lineLength < sizeof(line) - 1) {
+      line[lineLength++] = c;
+    }
+    return;
+  }
+  line[lineLength] = '\0';
+  lineLength = 0;
 
-    int s1, s2, s3, s4;
-    if (sscanf(line.c_str(), "%d %d %d %d", &s1, &s2, &s3, &s4) == 4) {
-      s1 = constrain(s1, 0, 180);
-      s2 = constrain(s2, 0, 180);
-      s3 = constrain(s3, 0, 180);
-      s4 = constrain(s4, 0, 180);
+  int s1, s2, s3, s4;
+  if (sscanf(line, "%d %d %d %d", &s1, &s2, &s3, &s4) == 4) {
+    writeServos(s1, s2, s3, s4);
+  }
+}
 
-      servo1.write(s1);
-      servo2.write(s2);
-      servo3.write(s3);
-      servo4.write(s4);
+void loop() {
+  while (Serial.available()) {
+    uint8_t b = Serial.read();
+    if (b == SYNC_BYTE) {
+      frameIndex = 0;
+      lineLength = 0;
+    } else if (frameIndex >= 0) {
+      handleBinaryByte(b);
+    } else {
+      handleTextByte((char)b);
     }
   }
 }
@@ -10,32 +10,57 @@ import time
 PORT = "COM5"      # or COM3, COM4, etc.
 BAUD = 115200
 
+# "text" sends "a1 a2 a3 a4\n" lines, "binary" sends 6-byte frames:
+#   0xFF a1 a2 a3 a4 checksum
+# Angles are 0-180 so the sync byte never appears inside a frame, and
+# checksum = (a1 + a2 + a3 + a4) % 255 is at most 254.
+PROTOCOLS = ["text", "binary"]
+SYNC_BYTE = 0xFF
+FRAME_SIZE = 6
+
 logger = logging.getLogger(__name__)
 
+def to_angles(force_command):
+    a1 = int(90 - ((force_command[0] + 1) * 45))
+    a2 = int((force_command[1] + 1) * 45)
+    a3 = int(90 - ((force_command[2] + 1) * 45))
+    a4 = int((force_command[3] + 1) * 45)
+    return a1, a2, a3, a4
+
+def encode_frame(angles):
+    angles = [min(max(a, 0), 180) for a in angles]
+    return bytes([SYNC_BYTE, *angles, sum(angles) % 255])
+
 class ArduinoDriver:
-    def __init__(self):
+    def __init__(self, port=PORT, baud=BAUD, protocol="text"):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol {protocol}. Valid protocols: {PROTOCOLS}")
+        self.port = port
+        self.baud = baud
+        self.protocol = protocol
         self.ws = None
         self.connected = False
         self.ser = None
 
     def connect(self):
         try:
-            self.ser = serial.Serial(PORT, BAUD, timeout=1)
+            self.ser = serial.Serial(self.port, self.baud, timeout=1)
             time.sleep(2)  # wait for the serial connection to initialize
             self.connected = True
-            logger.info(f"[Arduino] Connected to {PORT} at {BAUD} baud.")
+            logger.info(f"[Arduino] Connected to {self.port} at {self.baud} baud using the {self.protocol} protocol.")
         except Exception as e:
             logger.error(f"[Arduino] Connection failed: {e}")
             self.connected = False
 
     def send(self, force_command, timestamp=None):
         try:
-            a1 = int(90 - ((force_command[0] + 1) * 45))
-            a2 = int((force_command[1] + 1) * 45)
-            a3 = int(90 - ((force_command[2] + 1) * 45))
-            a4 = int((force_command[3] + 1) * 45)
-            msg = f"{a1} {a2} {a3} {a4}\n"
-            self.ser.write(msg.encode('ascii'))
+            angles = to_angles(force_command)
+            if self.protocol == "binary":
+                self.ser.write(encode_frame(angles))
+            else:
+                a1, a2, a3, a4 = angles
+                msg = f"{a1} {a2} {a3} {a4}\n"
+                self.ser.write(msg.encode('ascii'))
         except Exception as e:
             logger.error(f"[Arduino] Failed to send command: {e}")
 
@@ -0,0 +1,88 @@
+# output/arduino_loopback.py
+#
+# Verifies ArduinoDriver without a board: the driver writes to one end of a
+# pseudo terminal and a Python port of the model_car.ino parser decodes the
+# other end. Linux/macOS only.
+#
+#   python -m output.arduino_loopback [-p binary] [-n 500]
+
+import argparse
+import os
+import pty
+import random
+import select
+import time
+import tty
+from output.arduino_driver import ArduinoDriver, PROTOCOLS, SYNC_BYTE, to_angles
+
+class SketchParser:
+    """Byte-by-byte port of the loop() parser in output/arduino/model_car.ino."""
+    def __init__(self):
+        self.frame = []
+        self.in_frame = False
+        self.line = bytearray()
+        self.angles = []
+        self.bad_frames = 0
+        self.bytes = 0
+
+    def feed(self, data):
+        self.bytes += len(data)
+        for b in data:
+            if b == SYNC_BYTE:
+                self.in_frame = True
+                self.frame = []
+                self.line.clear()
+            elif self.in_frame:
+                self.frame.append(b)
+                if len(self.frame) == 5:
+                    self.in_frame = False
+                    if sum(self.frame[:4]) % 255 == self.frame[4]:
+                        self.angles.append(tuple(self.frame[:4]))
+                    else:
+                        self.bad_frames += 1
+            elif b == ord("\n"):
+                values = self.line.decode("ascii").split()
+                self.line.clear()
+                if len(values) == 4:
+                    self.angles.append(tuple(min(max(int(v), 0), 180) for v in values))
+            else:
+                self.line.append(b)
+
+def run_loopback(protocol, frames):
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    driver = ArduinoDriver(port=os.ttyname(slave), protocol=protocol)
+    driver.connect()
+    if not driver.connected:
+        raise RuntimeError("Could not open the pseudo terminal.")
+
+    parser = SketchParser()
+    expected = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        force = tuple(random.uniform(-1, 1) for _ in range(4))
+        expected.append(to_angles(force))
+        driver.send(force)
+        parser.feed(os.read(master, 4096))
+    elapsed = time.perf_counter() - start
+    while select.select([master], [], [], 0.1)[0]:
+        parser.feed(os.read(master, 4096))
+    driver.shutdown()
+    os.close(master)
+    os.close(slave)
+    return expected, parser, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", "--protocol", choices=PROTOCOLS, default="binary", help="Serial protocol to verify")
+    parser.add_argument("-n", "--frames", type=int, default=500, help="Number of force frames to send")
+    args = parser.parse_args()
+
+    expected, sketch, elapsed = run_loopback(args.protocol, args.frames)
+    matched = sum(a == b for a, b in zip(expected, sketch.angles))
+    print(f"Protocol: {args.protocol}")
+    print(f"Frames sent: {len(expected)}, decoded: {len(sketch.angles)}, matched: {matched}, bad checksums: {sketch.bad_frames}")
+    print(f"Bytes per frame: {sketch.bytes / len(expected):.1f}, send time per frame: {elapsed / len(expected) * 1e6:.1f} us")
+    if matched != len(expected) or len(sketch.angles) != len(expected):
+        raise SystemExit("Loopback FAILED")
+    print("Loopback OK")
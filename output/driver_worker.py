@@ -0,0 +1,108 @@
+# output/driver_worker.py
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class DriverWorker:
+    """
+    Runs the blocking send of an output driver on its own I/O thread.
+
+    The tick thread only publishes the newest force frame. The worker sends
+    whatever frame is latest when it is free again, so a slow write delays
+    the output instead of the tick loop, and frames published while a write
+    is in flight are coalesced into the newest one and counted as dropped.
+    """
+    def __init__(self, driver, name=None, tracer=None):
+        self.driver = driver
+        self.name = name or type(driver).__name__
+        self.tracer = tracer
+        self.cond = threading.Condition()
+        self.pending = None
+        self.pending_traces = []
+        self.running = False
+        self.thread = None
+        self.reset_stats()
+
+    @property
+    def connected(self):
+        return getattr(self.driver, "connected", False)
+
+    def reset_stats(self):
+        self.published = 0
+        self.sent = 0
+        self.dropped = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def connect(self):
+        self.driver.connect()
+        self.start()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"{self.name}Worker", daemon=True)
+        self.thread.start()
+
+    def publish(self, force, traces=None):
+        """Hand over the newest frame, traces are the trace ids of commands it is the first frame of."""
+        with self.cond:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = force
+            if traces:
+                self.pending_traces.extend(traces)
+            self.published += 1
+            self.cond.notify()
+
+    def send(self, force, traces=None):
+        self.publish(force, traces)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.pending is None and self.running:
+                    self.cond.wait()
+                # on shutdown the last published frame is still written once,
+                # it may be the zero force of a mode or target change
+                if self.pending is None:
+                    return
+                force = self.pending
+                self.pending = None
+                traces, self.pending_traces = self.pending_traces, []
+            start = time.perf_counter()
+            try:
+                self.driver.send(force)
+            except Exception as e:
+                logger.error(f"[{self.name}] Send failed: {e}")
+            latency = time.perf_counter() - start
+            if traces and self.tracer:
+                for trace_id in traces:
+                    self.tracer.mark(trace_id, "driver_send")
+            self.sent += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def get_stats(self):
+        return {
+            "driver": self.name,
+            "published": self.published,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "mean_latency_ms": self.total_latency / self.sent * 1000 if self.sent else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    def shutdown(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+        self.thread = None
+        if hasattr(self.driver, "shutdown"):
+            self.driver.shutdown()
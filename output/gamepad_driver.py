@@ -1,54 +1,106 @@
-
 # hardware/gamepad_driver.py
 
 import json
 import logging
 import socket
+import struct
+import time
 
 logger = logging.getLogger(__name__)
 
+HOST = "localhost"
+PORT = 8080
+
+# tcp frames are either newline terminated JSON, which the GamepadDriver
+# executable reads, or JSON prefixed by its length as a 4-byte big-endian
+# integer. udp sends one JSON datagram per frame with a sequence number so
+# that the receiver can drop late or reordered frames.
+TRANSPORTS = ["tcp", "udp"]
+FRAMINGS = ["newline", "length"]
+CONNECT_TIMEOUT = 0.5
+RECONNECT_INTERVAL = 1.0
+
+def encode_frame(payload, framing):
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    if framing == "length":
+        return struct.pack(">I", len(data)) + data
+    return data + b"\n"
+
 class GamepadDriver:
-    def __init__(self):
+    def __init__(self, host=HOST, port=PORT, transport="tcp", framing="newline", stamp=False):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport {transport}. Valid transports: {TRANSPORTS}")
+        if framing not in FRAMINGS:
+            raise ValueError(f"Unknown framing {framing}. Valid framings: {FRAMINGS}")
+        self.host = host
+        self.port = port
+        self.transport = transport
+        self.framing = framing
+        self.stamp = stamp
         self.sock = None
         self.connected = False
+        self.sequence = 0
+        self.next_reconnect = 0.0
 
     def connect(self):
         try:
-            logger.info(f"Connecting to Gamepad Driver at localhost:8080")
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.connect(('localhost', 8080))
+            logger.info(f"Connecting to Gamepad Driver at {self.host}:{self.port} over {self.transport}")
+            if self.transport == "udp":
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.sock.connect((self.host, self.port))
+            else:
+                self.sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.sock.settimeout(None)
             self.connected = True
             logger.info("Gamepad Driver connected.")
         except Exception as e:
             logger.error(f"[Gamepad Driver] Connection failed: {e}")
-            self.connected = False
+            self.close_socket()
+            self.next_reconnect = time.monotonic() + RECONNECT_INTERVAL
+
+    def reconnect(self):
+        """Retry the connection at most once per RECONNECT_INTERVAL."""
+        if time.monotonic() < self.next_reconnect:
+            return False
+        self.connect()
+        return self.connected
 
     def send(self, force_command):
         if not self.connected or self.sock is None:
-            logger.warning("Gamepad Driver not connected, skipping send.")
-            return
+            if not self.reconnect():
+                return
 
         try:
             payload = {
                 "command": "forces",
                 "forces": force_command
             }
-            self.sock.send(json.dumps(payload).encode())
+            if self.transport == "udp":
+                self.sequence += 1
+                payload["seq"] = self.sequence
+            if self.stamp:
+                payload["sent"] = time.monotonic()
+            if self.transport == "udp":
+                self.sock.send(json.dumps(payload, separators=(",", ":")).encode())
+            else:
+                self.sock.sendall(encode_frame(payload, self.framing))
         except Exception as e:
             logger.error(f"[Gamepad Driver] Failed to send command: {e}")
-            self.shutdown()
+            self.close_socket()
+            self.next_reconnect = time.monotonic() + RECONNECT_INTERVAL
 
     def receive(self):
         """Optional method to handle incoming messages if needed."""
         try:
-            msg = self.sock.recv()
+            msg = self.sock.recv(4096)
             if msg:
                 data = json.loads(msg)
                 print(data)
         except Exception as e:
             logger.warning(f"[Gamepad Driver] Receive error: {e}")
 
-    def shutdown(self):
+    def close_socket(self):
         if self.sock:
             try:
                 self.sock.close()
@@ -56,3 +108,7 @@ class GamepadDriver:
                 logger.warning(f"[Gamepad Driver] Shutdown error: {e}")
             self.sock = None
         self.connected = False
+
+    def shutdown(self):
+        self.close_socket()
+        self.next_reconnect = float("inf")
@@ -0,0 +1,187 @@
+# output/gamepad_standin.py
+#
+# Stand-in for the Windows GamepadDriver executable. Accepts the frames
+# GamepadDriver sends over tcp (newline or length framed) and udp, and reports
+# decode errors, lost or reordered datagrams and, for frames stamped by the
+# sender, the one-way latency. Sender and server must share a machine since
+# the latency compares time.monotonic() across processes (Linux).
+#
+#   python -m output.gamepad_standin                    # serve on port 8080
+#   python -m output.gamepad_standin --bench [-n 1000]  # drive every mode and compare
+
+import argparse
+import json
+import socket
+import struct
+import threading
+import time
+from output.gamepad_driver import GamepadDriver, PORT, FRAMINGS
+
+class FrameStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.bad_frames = 0
+        self.lost = 0
+        self.reordered = 0
+        self.last_sequence = 0
+        self.latencies = []
+        self.last_forces = None
+
+    def on_message(self, data, now):
+        try:
+            message = json.loads(data)
+            forces = message["forces"]
+        except (ValueError, KeyError, TypeError):
+            with self.lock:
+                self.bad_frames += 1
+            return
+        with self.lock:
+            sequence = message.get("seq")
+            if sequence is not None:
+                if sequence <= self.last_sequence:
+                    self.reordered += 1
+                    return
+                self.lost += sequence - self.last_sequence - 1
+                self.last_sequence = sequence
+            if "sent" in message:
+                self.latencies.append(now - message["sent"])
+            self.frames += 1
+            self.last_forces = forces
+
+    def get_stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            count = len(latencies)
+            return {
+                "frames": self.frames,
+                "bad_frames": self.bad_frames,
+                "lost": self.lost,
+                "reordered": self.reordered,
+                "mean_latency_us": sum(latencies) / count * 1e6 if count else None,
+                "p99_latency_us": latencies[int(count * 0.99)] * 1e6 if count else None,
+                "max_latency_us": latencies[-1] * 1e6 if count else None,
+            }
+
+class StandinServer:
+    """Serves one tcp client at a time, like the executable, and udp alongside it."""
+    def __init__(self, host="127.0.0.1", port=PORT, framing="newline"):
+        self.framing = framing
+        self.stats = FrameStats()
+        self.running = False
+        self.tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.tcp.bind((host, port))
+        self.tcp.listen(1)
+        self.tcp.settimeout(0.2)
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind((host, port))
+        self.udp.settimeout(0.2)
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        for target in (self._serve_tcp, self._serve_udp):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _serve_udp(self):
+        while self.running:
+            try:
+                data = self.udp.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.stats.on_message(data, time.monotonic())
+
+    def _serve_tcp(self):
+        while self.running:
+            try:
+                client, _ = self.tcp.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            client.settimeout(0.2)
+            with client:
+                self._read_client(client)
+
+    def _read_client(self, client):
+        pending = b""
+        while self.running:
+            try:
+                data = client.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+            now = time.monotonic()
+            pending += data
+            if self.framing == "length":
+                while len(pending) >= 4:
+                    (size,) = struct.unpack_from(">I", pending)
+                    if len(pending) < 4 + size:
+                        break
+                    self.stats.on_message(pending[4:4 + size], now)
+                    pending = pending[4 + size:]
+            else:
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    self.stats.on_message(line, now)
+
+    def shutdown(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self.tcp.close()
+        self.udp.close()
+
+def run_bench(port, frames, interval):
+    results = {}
+    modes = [("tcp", framing) for framing in FRAMINGS] + [("udp", "newline")]
+    for transport, framing in modes:
+        server = StandinServer(port=port, framing=framing)
+        server.start()
+        driver = GamepadDriver(host="127.0.0.1", port=port, transport=transport, framing=framing, stamp=True)
+        driver.connect()
+        next_time = time.perf_counter()
+        for i in range(frames):
+            driver.send([i % 100 / 100, 0.0, 0.0, 0.0])
+            next_time += interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        time.sleep(0.2)
+        driver.shutdown()
+        server.shutdown()
+        results[f"{transport}/{framing}" if transport == "tcp" else transport] = server.stats.get_stats()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", "--port", type=int, default=PORT, help="Port to listen on")
+    parser.add_argument("-f", "--framing", choices=FRAMINGS, default="newline", help="Framing of tcp clients")
+    parser.add_argument("--bench", action="store_true", help="Drive GamepadDriver in every mode and report latency")
+    parser.add_argument("-n", "--frames", type=int, default=1000, help="Frames per mode in --bench")
+    parser.add_argument("-i", "--interval", type=float, default=10.0, help="Milliseconds between frames in --bench")
+    args = parser.parse_args()
+
+    if args.bench:
+        for mode, stats in run_bench(args.port, args.frames, args.interval / 1000).items():
+            print(f"{mode:<12} {stats}")
+    else:
+        server = StandinServer(port=args.port, framing=args.framing)
+        server.start()
+        print(f"Gamepad stand-in listening on port {args.port} (tcp {args.framing} framing and udp)")
+        try:
+            while True:
+                time.sleep(1)
+                print(server.stats.get_stats())
+        except KeyboardInterrupt:
+            pass
+        server.shutdown()
@@ -0,0 +1,53 @@
+# player/clock_sync.py
+
+from collections import deque
+import time
+
+PING_INTERVAL = 2.0
+PING_BURST = 5
+PING_BURST_INTERVAL = 0.05
+SAMPLE_WINDOW = 16
+
+class ClockSync:
+    """
+    Estimates the offset of the MotionBridge clock relative to the local clock.
+
+    The player sends {"command": "ping", "t0"} and the bridge answers with
+    {"command": "pong", "t0", "t1", "t2"}, t1 and t2 being its receive and
+    send times. Each round trip gives an NTP-style sample
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        rtt = (t3 - t0) - (t2 - t1)
+    and the estimate uses the sample with the smallest round trip among the
+    last SAMPLE_WINDOW, which is the one least distorted by queueing delay.
+    """
+    def __init__(self, window=SAMPLE_WINDOW, clock=time.time):
+        self.clock = clock
+        self.samples = deque(maxlen=window)
+        self.offset = 0.0
+        self.rtt = None
+
+    @property
+    def synced(self):
+        return self.rtt is not None
+
+    def make_ping(self):
+        return {"command": "ping", "t0": self.clock()}
+
+    def on_pong(self, data):
+        t3 = self.clock()
+        t0, t1, t2 = data["t0"], data["t1"], data["t2"]
+        rtt = (t3 - t0) - (t2 - t1)
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        self.samples.append((rtt, offset))
+        self.rtt, self.offset = min(self.samples)
+
+    def to_local(self, remote_time):
+        """Convert a time on the bridge clock to the local clock."""
+        return remote_time - self.offset
+
+    def get_stats(self):
+        return {
+            "offset_ms": self.offset * 1000,
+            "rtt_ms": self.rtt * 1000 if self.synced else None,
+            "samples": len(self.samples),
+        }
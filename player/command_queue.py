@@ -0,0 +1,54 @@
+# player/command_queue.py
+
+from collections import deque
+import threading
+
+DEFAULT_MAXSIZE = 256
+
+class CommandQueue:
+    """
+    Bounded thread-safe FIFO of player commands.
+
+    The websocket listener puts commands as they arrive and the tick thread
+    drains everything pending once per tick, in arrival order. When the queue
+    is full the oldest command is dropped to make room for the newest one.
+    """
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.commands = deque()
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.dropped = 0
+        self.drained = 0
+        self.max_depth = 0
+
+    def put(self, command):
+        with self.lock:
+            if len(self.commands) >= self.maxsize:
+                self.commands.popleft()
+                self.dropped += 1
+            self.commands.append(command)
+            self.queued += 1
+            self.max_depth = max(self.max_depth, len(self.commands))
+
+    def drain(self):
+        with self.lock:
+            if not self.commands:
+                return []
+            commands = list(self.commands)
+            self.commands.clear()
+            self.drained += len(commands)
+            return commands
+
+    def __len__(self):
+        return len(self.commands)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "depth": len(self.commands),
+                "max_depth": self.max_depth,
+                "queued": self.queued,
+                "dropped": self.dropped,
+                "drained": self.drained,
+            }
@@ -0,0 +1,169 @@
+# player/force_recorder.py
+#
+# Binary log of what the player sent to its target, one record per tick.
+# A session is a preallocated .npy file of RECORD_DTYPE records written
+# through a memory map, plus a .json sidecar with the session start and the
+# target names. Unused records have tick 0. A full session continues in a
+# new segment file, <name>.1.npy, <name>.2.npy and so on, which is created
+# ahead of time on a background thread.
+#
+#   python -m player.motion_player_main -m event -t gamepad --record logs/session.npy
+#   python -m player.force_recorder logs/session.npy
+
+import argparse
+from bisect import bisect_left
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+import numpy as np
+
+RECORD_DTYPE = np.dtype([
+    ("tick", "<u8"),
+    ("time", "<f8"),
+    ("force", "<f4", (4,)),
+    ("lateness", "<f4"),
+    ("command", "<u4"),
+    ("target", "u1"),
+])
+# one hour at 100 Hz, about 15 MB
+DEFAULT_CAPACITY = 360000
+
+def segment_path(path, segment):
+    path = Path(path)
+    if segment == 0:
+        return path
+    return path.with_name(f"{path.stem}.{segment}{path.suffix}")
+
+def sidecar_path(path):
+    return Path(path).with_suffix(".json")
+
+class ForceRecorder:
+    """
+    Appends one record per tick to a memory-mapped session file.
+
+    The file is allocated up front, so record() is a single structured
+    assignment into the mapping, with no allocation, encoding or system
+    call on the tick thread. The OS writes the pages back, and close()
+    flushes them. A background thread creates the next segment while the
+    current one fills and flushes the full one after the switch, so a
+    rollover only swaps in the prepared mapping.
+    """
+    def __init__(self, path, targets, capacity=DEFAULT_CAPACITY, clock=time.perf_counter):
+        self.path = Path(path)
+        self.target_ids = {target: i for i, target in enumerate(targets)}
+        self.capacity = capacity
+        self.segment = 0
+        self.count = 0
+        self.ticks = 0
+        self.jobs = queue.SimpleQueue()
+        self.prepared = queue.SimpleQueue()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(sidecar_path(self.path), "w") as f:
+            json.dump({
+                "start_time": time.time(),
+                "start_clock": clock(),
+                "targets": list(targets),
+                "capacity": capacity,
+            }, f, indent=4)
+        self.records = self._create_segment(0)
+        self.worker = threading.Thread(target=self._run, name="ForceRecorder", daemon=True)
+        self.worker.start()
+        self.jobs.put(lambda: self.prepared.put(self._create_segment(1)))
+
+    def _create_segment(self, segment):
+        return np.lib.format.open_memmap(
+            segment_path(self.path, segment), mode="w+", dtype=RECORD_DTYPE, shape=(self.capacity,)
+        )
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            job()
+
+    def _next_segment(self):
+        # only blocks if the tick thread filled a whole segment before the
+        # worker created a file, which takes milliseconds
+        full = self.records
+        self.records = self.prepared.get()
+        self.segment += 1
+        self.count = 0
+        following = self.segment + 1
+        self.jobs.put(full.flush)
+        self.jobs.put(lambda: self.prepared.put(self._create_segment(following)))
+
+    def record(self, now, force, target, lateness, command):
+        if self.count == self.capacity:
+            self._next_segment()
+        self.ticks += 1
+        self.records[self.count] = (self.ticks, now, force, lateness, command, self.target_ids.get(target, 255))
+        self.count += 1
+
+    def close(self):
+        if self.records is None:
+            return
+        self.jobs.put(None)
+        self.worker.join()
+        self.records.flush()
+        self.records = None
+        # the prepared segment was never written to
+        try:
+            unused = self.prepared.get_nowait()
+        except queue.Empty:
+            return
+        del unused
+        os.remove(segment_path(self.path, self.segment + 1))
+
+    def get_stats(self):
+        return {
+            "path": str(self.path),
+            "ticks": self.ticks,
+            "segments": self.segment + 1,
+        }
+
+def load_session(path):
+    """
+    The records of one session file as a read-only memory-mapped array,
+    without copying, cut at the first unused record.
+    """
+    records = np.load(path, mmap_mode="r")
+    ticks = records["tick"]
+    count = bisect_left(range(len(records)), True, key=lambda i: ticks[i] == 0)
+    return records[:count]
+
+def session_segments(path):
+    """Paths of the segment files of a session, in order."""
+    segment = 0
+    while segment_path(path, segment).exists():
+        yield segment_path(path, segment)
+        segment += 1
+
+def load_sidecar(path):
+    with open(sidecar_path(path), "r") as f:
+        return json.load(f)
+
+def summarize(records, targets):
+    lateness = records["lateness"] * 1000
+    return {
+        "ticks": len(records),
+        "duration_s": float(records["time"][-1] - records["time"][0]) if len(records) else 0.0,
+        "mean_lateness_ms": float(lateness.mean()) if len(records) else 0.0,
+        "max_lateness_ms": float(lateness.max()) if len(records) else 0.0,
+        "commands": int(len(np.unique(records["command"][records["command"] > 0]))),
+        "targets": {
+            targets[i] if i < len(targets) else "unknown": int(n)
+            for i, n in zip(*np.unique(records["target"], return_counts=True))
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="Session file written with --record")
+    args = parser.parse_args()
+    targets = load_sidecar(args.path)["targets"]
+    for path in session_segments(args.path):
+        print(f"{path}: {summarize(load_session(path), targets)}")
@@ -0,0 +1,107 @@
+# player/force_track.py
+#
+# A video mapping fully determines the forces it produces, so it can be
+# rendered once through MotionPlayer into an (N, 4) float32 force track with
+# one sample per tick, and streamed by the player instead of interpreting
+# its events live. Tracks are cached in TRACK_DIR by a hash of the mapping
+# and of the mtime and size of the motion files it references.
+
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+import numpy as np
+from player.motion_player import MotionPlayer, MotionMode, FREQUENCY, motion_dir
+from player import motion_store
+from player.tick_scheduler import start_tick
+
+TRACK_DIR = Path("tracks/")
+TRACK_LAYER = "video"
+# bump when rendering changes so that stale tracks are not reused
+RENDER_VERSION = 2
+# samples rendered after the last event at most, when the mapping has no duration
+MAX_TAIL = 60 * FREQUENCY
+
+def _sorted_events(mapping):
+    return sorted(mapping["videoEvents"], key=lambda event: event["timeOffset"])
+
+def track_key(mapping):
+    """
+    Hash of everything the rendered track depends on. Motion files are
+    identified by mtime and size, as MotionCache does, without reading them.
+    """
+    digest = hashlib.sha256()
+    events = [
+        [event["timeOffset"], event["motion"], event["behavior"], event["scale"]]
+        for event in _sorted_events(mapping)
+    ]
+    digest.update(json.dumps([RENDER_VERSION, FREQUENCY, mapping.get("videoDuration"), events]).encode())
+    for motion in sorted({event["motion"] for event in mapping["videoEvents"]} - {"none"}):
+        digest.update(motion.encode())
+        path = motion_store.samples_file(motion, motion_dir)
+        try:
+            stat = path.stat()
+            digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+        except FileNotFoundError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+def track_path(key, track_dir=TRACK_DIR):
+    return Path(track_dir) / f"{key}.npy"
+
+def render_track(mapping):
+    """
+    Render the events of a video mapping into a force track. Every event is
+    queued on the video layer at the tick PlayerRuntime applies it at with
+    a start time, and the ticks in between are mixed in blocks.
+    """
+    player = MotionPlayer()
+    player.verbose = False
+    player.set_mode(MotionMode.EVENT)
+    blocks = []
+    tick = 0
+    for event in _sorted_events(mapping):
+        event_tick = start_tick(event["timeOffset"], 1 / FREQUENCY)
+        if event_tick > tick:
+            blocks.append(player.update_block(event_tick - tick))
+            tick = event_tick
+        try:
+            player.handle_motion(event["motion"], event["behavior"], event["scale"], TRACK_LAYER)
+        except FileNotFoundError:
+            print(f"[ForceTrack] Motion {event['motion']} not found, skipped.")
+
+    if mapping.get("videoDuration") is not None:
+        end = math.ceil(mapping["videoDuration"] * FREQUENCY)
+    else:
+        end = tick + min(int(player.mixer.queued.max()), MAX_TAIL)
+    if end > tick:
+        blocks.append(player.update_block(end - tick))
+    if not blocks:
+        return np.zeros((0, 4), dtype=np.float32)
+    return np.concatenate(blocks)[:end].astype(np.float32)
+
+def load_track(key, track_dir=TRACK_DIR, mmap=True):
+    """A cached track by key, memory-mapped by default. Returns None if it is not cached."""
+    path = track_path(key, track_dir)
+    if not path.exists():
+        return None
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+def get_track(mapping, track_dir=TRACK_DIR):
+    """
+    The key and samples of the track of a mapping, rendered and cached on
+    first use. Returns (key, track, cached).
+    """
+    key = track_key(mapping)
+    track = load_track(key, track_dir)
+    if track is not None:
+        return key, track, True
+    track = render_track(mapping)
+    path = track_path(key, track_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, track)
+    os.replace(tmp_path, path)
+    return key, track, False
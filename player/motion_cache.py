@@ -0,0 +1,81 @@
+# player/motion_cache.py
+
+from collections import OrderedDict
+import threading
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class MotionCache:
+    """
+    LRU cache of decoded motion shapes keyed by motion name.
+
+    Each entry remembers the mtime and size of the file it was decoded from
+    and is reloaded when either changes. Entries are evicted least recently
+    used first once the cached arrays exceed max_bytes.
+    """
+    def __init__(self, loader, path_of, max_bytes=DEFAULT_MAX_BYTES):
+        self.loader = loader
+        self.path_of = path_of
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        path = self.path_of(name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self.invalidate(name)
+            raise
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry and entry[0] == key:
+                self.entries.move_to_end(name)
+                self.hits += 1
+                return entry[1]
+
+        shapes = self.loader(path)
+        shapes.setflags(write=False)
+        with self.lock:
+            self.misses += 1
+            self._pop(name)
+            if shapes.nbytes <= self.max_bytes:
+                self.entries[name] = (key, shapes)
+                self.nbytes += shapes.nbytes
+                while self.nbytes > self.max_bytes:
+                    self._pop(next(iter(self.entries)))
+        return shapes
+
+    def warm(self, names):
+        for name in names:
+            try:
+                self.get(name)
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def invalidate(self, name=None):
+        with self.lock:
+            if name is None:
+                self.entries.clear()
+                self.nbytes = 0
+            else:
+                self._pop(name)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _pop(self, name):
+        entry = self.entries.pop(name, None)
+        if entry:
+            self.nbytes -= entry[1].nbytes
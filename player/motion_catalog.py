@@ -0,0 +1,120 @@
+# player/motion_catalog.py
+
+from bisect import bisect_left
+import os
+import threading
+import time
+from pathlib import Path
+from player.motion_store import MOTION_DIR, JSON_SUFFIX, SAMPLES_SUFFIX, motion_name
+
+POLL_INTERVAL = 1.0
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class MotionCatalog:
+    """
+    In-memory set of the motion names in a motion directory.
+
+    Existence checks and listings are answered from memory. The directory is
+    rescanned when its mtime changes, which is checked at most once per
+    poll_interval on access, so files added or removed by other processes
+    show up within that interval. Writers in this process call add, discard
+    and rename so that their changes are visible immediately.
+    """
+    def __init__(self, motion_dir=MOTION_DIR, poll_interval=POLL_INTERVAL, clock=time.monotonic):
+        self.motion_dir = Path(motion_dir)
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.motions = set()
+        self.sorted_names = None
+        self.dir_mtime = None
+        self.next_poll = 0.0
+        self.scans = 0
+
+    def _scan(self):
+        motions = set()
+        with os.scandir(self.motion_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith((JSON_SUFFIX, SAMPLES_SUFFIX)) and not entry.name.startswith(".") and entry.is_file():
+                    motions.add(motion_name(entry.name))
+        return motions
+
+    def refresh(self, force=False):
+        """Rescan the directory if it changed since the last scan, or always with force."""
+        try:
+            mtime = self.motion_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self.lock:
+            self.next_poll = self.clock() + self.poll_interval
+            if not force and mtime == self.dir_mtime:
+                return False
+            self.motions = self._scan() if mtime is not None else set()
+            self.sorted_names = None
+            self.dir_mtime = mtime
+            self.scans += 1
+            return True
+
+    def _poll(self):
+        if self.clock() >= self.next_poll:
+            self.refresh()
+
+    def exists(self, name):
+        self._poll()
+        return name in self.motions
+
+    def __contains__(self, name):
+        return self.exists(name)
+
+    def __len__(self):
+        self._poll()
+        return len(self.motions)
+
+    def names(self):
+        """All motion names in sorted order. The list is shared, do not modify it."""
+        self._poll()
+        with self.lock:
+            if self.sorted_names is None:
+                self.sorted_names = sorted(self.motions)
+            return self.sorted_names
+
+    def query(self, prefix=None, contains=None, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """
+        One page of the sorted names starting with prefix and containing
+        contains (case insensitive). Returns the total number of matches and
+        the page.
+        """
+        names = self.names()
+        if prefix:
+            start = bisect_left(names, prefix)
+            end = bisect_left(names, prefix + "\uffff", start)
+            names = names[start:end]
+        if contains:
+            contains = contains.lower()
+            names = [name for name in names if contains in name.lower()]
+        return len(names), names[offset:offset + limit]
+
+    def add(self, name):
+        with self.lock:
+            if name not in self.motions:
+                self.motions.add(name)
+                self.sorted_names = None
+
+    def discard(self, name):
+        with self.lock:
+            if name in self.motions:
+                self.motions.discard(name)
+                self.sorted_names = None
+
+    def rename(self, name, new_name):
+        with self.lock:
+            self.motions.discard(name)
+            self.motions.add(new_name)
+            self.sorted_names = None
+
+    def get_stats(self):
+        return {
+            "motions": len(self.motions),
+            "scans": self.scans,
+        }
@@ -0,0 +1,138 @@
+# player/motion_index.py
+
+import json
+import os
+import threading
+from pathlib import Path
+from player import motion_store
+from player.motion_store import MOTION_DIR, SHAPE_KEYS, SAMPLES_KEY
+
+FREQUENCY = 100
+INDEX_NAME = ".index.json"
+
+def metadata_file(name, motion_dir=MOTION_DIR):
+    """Path of the file holding the metadata of a motion, or None if it does not exist."""
+    fmt = motion_store.motion_format(name, motion_dir)
+    if fmt == "binary":
+        return motion_store.meta_path(name, motion_dir)
+    if fmt == "json":
+        return motion_store.json_path(name, motion_dir)
+    return None
+
+def build_entry(name, motion_dir=MOTION_DIR):
+    """
+    Metadata of a motion without its shapes, plus its sample count, duration
+    and composition degree. Binary motions only read their .meta.json.
+    """
+    path = metadata_file(name, motion_dir)
+    if path is None:
+        return None
+    with open(path, "r") as f:
+        metadata = json.load(f)
+    if SAMPLES_KEY in metadata:
+        samples = metadata.pop(SAMPLES_KEY)["length"]
+    else:
+        samples = min(len(metadata.get(key, [])) for key in SHAPE_KEYS)
+    for key in SHAPE_KEYS:
+        metadata.pop(key, None)
+    metadata["samples"] = samples
+    metadata["duration"] = samples / FREQUENCY
+    metadata.setdefault("compositionDegree", 0)
+    return metadata
+
+class MotionIndex:
+    """
+    Persistent index of motion metadata, stored as .index.json in the motion
+    directory.
+
+    Every entry remembers the mtime and size of the file its metadata was read
+    from. A lookup stats that file and only rereads it when either changed, so
+    entries stay correct after writes by other processes. Writers in this
+    process call update, discard and rename after changing a motion.
+    """
+    def __init__(self, motion_dir=MOTION_DIR):
+        self.motion_dir = Path(motion_dir)
+        self.path = self.motion_dir / INDEX_NAME
+        self.lock = threading.RLock()
+        self.entries = None
+        self.dirty = False
+
+    def _load(self):
+        if self.entries is not None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def _lookup(self, name):
+        path = metadata_file(name, self.motion_dir)
+        if path is None:
+            if self.entries.pop(name, None) is not None:
+                self.dirty = True
+            return None
+        stat = path.stat()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        entry = self.entries.get(name)
+        if entry is None or entry["stamp"] != stamp:
+            metadata = build_entry(name, self.motion_dir)
+            if metadata is None:
+                return None
+            entry = {"stamp": stamp, "metadata": metadata}
+            self.entries[name] = entry
+            self.dirty = True
+        return entry["metadata"]
+
+    def get(self, name):
+        """Metadata of one motion, or None if it does not exist."""
+        with self.lock:
+            self._load()
+            metadata = self._lookup(name)
+            self.save()
+            return dict(metadata) if metadata is not None else None
+
+    def get_many(self, names):
+        """Metadata of several motions by name, skipping those that do not exist."""
+        result = {}
+        with self.lock:
+            self._load()
+            for name in names:
+                metadata = self._lookup(name)
+                if metadata is not None:
+                    result[name] = dict(metadata)
+            self.save()
+        return result
+
+    def update(self, name):
+        with self.lock:
+            self._load()
+            self.entries.pop(name, None)
+            self._lookup(name)
+            self.dirty = True
+            self.save()
+
+    def discard(self, name):
+        with self.lock:
+            self._load()
+            if self.entries.pop(name, None) is not None:
+                self.dirty = True
+                self.save()
+
+    def rename(self, name, new_name):
+        with self.lock:
+            self._load()
+            self.entries.pop(name, None)
+            self._lookup(new_name)
+            self.dirty = True
+            self.save()
@@ -0,0 +1,183 @@
+# player/motion_mixer.py
+
+import numpy as np
+
+DEFAULT_LAYER = "main"
+# one layer per input source, every mixed tick covers all layers in use
+LAYERS = [DEFAULT_LAYER, "haptics", "video", "audio", "gesture"]
+MASTER_CLIP = 1.0
+
+class MotionMixer:
+    """
+    Additive mixer over several motion layers.
+
+    All layers share one preallocated (layers, capacity, 4) buffer and each
+    layer is a ring with its own head and queued sample count. A layer has a
+    gain, a priority, a clip limit and a duck factor which attenuates it
+    while any layer of higher priority is playing. Mixing a block gathers the
+    next samples of every layer at once, weights and clips them per layer and
+    sums them into a single (n, 4) output. Only the LAYERS exist, each
+    one created on first use.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.names = []
+        self.buffer = np.zeros((0, capacity, 4))
+        self.heads = np.zeros(0, dtype=int)
+        self.queued = np.zeros(0, dtype=int)
+        self.gains = np.zeros(0)
+        self.priorities = np.zeros(0)
+        self.clips = np.zeros(0)
+        self.ducks = np.zeros(0)
+        self.above = np.zeros((0, 0))
+        self.latest_motions = []
+        self.add_layer(DEFAULT_LAYER)
+
+    def add_layer(self, name, gain=1.0, priority=0, clip=1.0, duck=1.0):
+        if name in self.names:
+            return self.configure_layer(name, gain, priority, clip, duck)
+        if name not in LAYERS:
+            raise ValueError(f"Unknown layer {name}. Valid layers: {LAYERS}")
+        self.names.append(name)
+        self.buffer = np.concatenate([self.buffer, np.zeros((1, self.capacity, 4))])
+        self.heads = np.append(self.heads, 0)
+        self.queued = np.append(self.queued, 0)
+        self.gains = np.append(self.gains, gain)
+        self.priorities = np.append(self.priorities, priority)
+        self.clips = np.append(self.clips, clip)
+        self.ducks = np.append(self.ducks, duck)
+        self.latest_motions.append("none")
+        self._update_priorities()
+        return len(self.names) - 1
+
+    def configure_layer(self, name, gain=None, priority=None, clip=None, duck=None):
+        index = self.layer_index(name)
+        if gain is not None:
+            self.gains[index] = gain
+        if priority is not None:
+            self.priorities[index] = priority
+        if clip is not None:
+            self.clips[index] = clip
+        if duck is not None:
+            self.ducks[index] = duck
+        self._update_priorities()
+        return index
+
+    def layer_index(self, name):
+        """Index of a layer, created with default settings on first use."""
+        if name not in self.names:
+            return self.add_layer(name)
+        return self.names.index(name)
+
+    def get_layers(self):
+        return [{
+            "layer": name,
+            "gain": float(self.gains[i]),
+            "priority": float(self.priorities[i]),
+            "clip": float(self.clips[i]),
+            "duck": float(self.ducks[i]),
+            "queued": int(self.queued[i]),
+        } for i, name in enumerate(self.names)]
+
+    def _update_priorities(self):
+        # above[l, m] is 1 when layer m ducks layer l
+        self.above = (self.priorities[None, :] > self.priorities[:, None]).astype(float)
+        self.ducking = bool(np.any(self.ducks != 1.0))
+        self.rows = np.arange(len(self.names))
+
+    def _ring_slices(self, index, offset, n):
+        begin = (self.heads[index] + offset) % self.capacity
+        first = min(n, self.capacity - begin)
+        return slice(begin, begin + first), slice(0, n - first), first
+
+    def _write(self, index, offset, sequence):
+        tail, wrapped, first = self._ring_slices(index, offset, len(sequence))
+        self.buffer[index, tail] = sequence[:first]
+        self.buffer[index, wrapped] = sequence[first:]
+
+    def _reset_layer(self, index):
+        tail, wrapped, _ = self._ring_slices(index, 0, self.queued[index])
+        self.buffer[index, tail] = 0
+        self.buffer[index, wrapped] = 0
+        self.heads[index] = 0
+        self.queued[index] = 0
+
+    def reset(self, name=None):
+        if name is None:
+            for index in range(len(self.names)):
+                self._reset_layer(index)
+        elif name in self.names:
+            self._reset_layer(self.names.index(name))
+
+    def queue(self, name, motion, sequence, behavior):
+        """Queue a scaled (N, 4) sequence on a layer with replace/append/clear semantics."""
+        index = self.layer_index(name)
+        N = len(sequence)
+        latest_motion = self.latest_motions[index]
+
+        # Allow only if the last motion is different
+        if behavior == "single" and motion != latest_motion:
+            behavior = "replace"
+
+        # same motion persists, other motion interrupts
+        if behavior == "inherit":
+            behavior = "append" if latest_motion == motion else "replace"
+
+        if behavior == "replace":
+            self._reset_layer(index)
+            if N > self.capacity:
+                return
+            self._write(index, 0, sequence)
+            self.queued[index] = N
+
+        if behavior == "append":
+            if self.queued[index] + N > self.capacity:
+                return
+            self._write(index, self.queued[index], sequence)
+            self.queued[index] += N
+
+        if behavior == "clear":
+            self._reset_layer(index)
+
+        self.latest_motions[index] = motion
+
+    def mix_one(self):
+        """Consume the next sample of every layer and return their mix as a 4-tuple."""
+        if not self.queued.any():
+            return (0.0, 0.0, 0.0, 0.0)
+        rows = self.rows
+        samples = self.buffer[rows, self.heads]
+        self.buffer[rows, self.heads] = 0
+
+        weights = self.gains
+        if self.ducking:
+            weights = weights * np.where(self.above @ (self.queued > 0) > 0, self.ducks, 1.0)
+        samples *= weights[:, None]
+        limits = self.clips[:, None]
+        np.minimum(samples, limits, out=samples)
+        np.maximum(samples, -limits, out=samples)
+
+        self.heads += 1
+        self.heads %= self.capacity
+        self.queued -= self.queued > 0
+        total = samples.sum(axis=0).tolist()
+        return tuple(min(max(x, -MASTER_CLIP), MASTER_CLIP) for x in total)
+
+    def mix(self, n=1):
+        """Consume the next n samples of every layer and return their (n, 4) mix."""
+        n = min(n, self.capacity)
+        offsets = np.arange(n)
+        rows = np.arange(len(self.names))[:, None]
+        columns = (self.heads[:, None] + offsets) % self.capacity
+        block = self.buffer[rows, columns]
+        self.buffer[rows, columns] = 0
+
+        active = offsets[None, :] < self.queued[:, None]
+        ducked = (self.above @ active) > 0
+        weights = self.gains[:, None] * np.where(ducked, self.ducks[:, None], 1.0)
+        limits = self.clips[:, None, None]
+        block = np.clip(block * weights[:, :, None], -limits, limits)
+
+        self.heads = (self.heads + n) % self.capacity
+        self.queued = np.maximum(self.queued - n, 0)
+        return np.clip(block.sum(axis=0), -MASTER_CLIP, MASTER_CLIP)
@@ -1,9 +1,13 @@
-
 # player/motion_player.py
 
 from enum import Enum, auto
-import json
-from pathlib import Path
+import numpy as np
+from player.motion_cache import MotionCache
+from player.motion_catalog import MotionCatalog
+from player.motion_index import MotionIndex
+from player import motion_store
+from player.motion_store import shapes_from_motion_data
+from player.motion_mixer import MotionMixer, DEFAULT_LAYER, MASTER_CLIP
 
 FREQUENCY = 100
 BEHAVIORS = ["disable", "inherit", "replace", "append", "clear", "single"]
@@ -21,62 +25,94 @@ TARGET_LIST = [
     "gamepad"
     ]
 
-motion_dir = Path("motions/")
+motion_dir = motion_store.MOTION_DIR
+motion_catalog = MotionCatalog(motion_dir)
+motion_index = MotionIndex(motion_dir)
+
 def load_motion_lib(include_none=True):
-    motion_lib = [f.stem for f in motion_dir.iterdir() if f.is_file()]
+    motion_lib = list(motion_catalog.names())
     if include_none:
         return ["none"] + motion_lib
     else:
         return motion_lib
 
+def motion_in_lib(motion_name, include_none=True):
+    if motion_name == "none":
+        return include_none
+    return motion_catalog.exists(motion_name)
+
 def load_motion(motion_name):
     if not motion_name:
         return {}
     if motion_name == "none":
         return {}
-    path = motion_dir / f"{motion_name}.json"
-    if not path.exists():
+    motion_data = motion_store.read_motion(motion_name, motion_dir)
+    if motion_data is None:
         return {}
-    with open(path, "r") as f:
-        motion_data = json.load(f)
     motion_data["duration"] = len(motion_data["flShape"]) / FREQUENCY
     return motion_data
 
+def load_motion_metadata(motion_name):
+    """Metadata of a motion from the index, without reading its samples."""
+    if not motion_name or motion_name == "none":
+        return {}
+    return motion_index.get(motion_name) or {}
+
+# samples are copied into memory so that the editor can still replace the
+# files while the player holds them in its cache
+motion_cache = MotionCache(
+    lambda path: motion_store.read_shapes_file(path, mmap=False),
+    lambda name: motion_store.samples_file(name, motion_dir)
+    )
+
 def load_motion_shapes(motion_name):
     if motion_name == "none":
-        return []
-    path = motion_dir / f"{motion_name}.json"
-    with open(path, "r") as f:
-        motion_data = json.load(f)
-
-    fl = motion_data["flShape"]
-    fr = motion_data["frShape"]
-    rl = motion_data["rlShape"]
-    rr = motion_data["rrShape"]
-    return list(zip(fl, fr, rl, rr))
+        return np.zeros((0, 4))
+    return motion_cache.get(motion_name)
 
 class MotionPlayer:
+    """
+    Plays queued motion samples, one sample per tick.
+
+    Motions are queued on named layers of a MotionMixer, each a preallocated
+    ring buffer. A tick mixes the next sample of every layer in one
+    vectorized pass, so its cost does not depend on the buffer size.
+    Motions without a layer go to DEFAULT_LAYER and keep the single
+    timeline replace/append/clear behavior.
+    """
     def __init__(self, buffer_size=5000):
         self.mode = MotionMode.OFF
         self.buffer_size = buffer_size
 
+        # the first third of the buffer is reserved history,
+        # only the remaining lookahead holds samples to play
         self.start_index = buffer_size // 3
-        self.pointer = self.start_index
+        self.capacity = buffer_size - self.start_index
 
-        self.buffer = [(0, 0, 0, 0)] * buffer_size
-        self.accuracy_buffer = [False] * buffer_size
+        self.mixer = MotionMixer(self.capacity)
         self.latest_force = (0, 0, 0, 0)
         self.accuracy = False
         self.latest_motion = "none"
+        self.track = None
+        self.track_cursor = 0.0
+        self.track_rate = 1.0
+        # log every queued motion, off for offline rendering
+        self.verbose = True
+
+    @property
+    def pointer(self):
+        """Position right after the last sample queued on the default layer, in buffer coordinates."""
+        return self.start_index + int(self.mixer.queued[0])
 
     def set_mode(self, new_mode: MotionMode):
         self.mode = new_mode
         self._reset_buffer()
 
     def _reset_buffer(self):
-        self.buffer = [(0, 0, 0, 0)] * self.buffer_size
-        self.accuracy_buffer = [False] * self.buffer_size
-        self.pointer = self.start_index
+        self.mixer.reset()
+
+    def configure_layer(self, layer, gain=None, priority=None, clip=None, duck=None):
+        self.mixer.configure_layer(layer, gain, priority, clip, duck)
 
     def update(self, signal=None):
         if self.mode == MotionMode.OFF:
@@ -85,6 +121,8 @@ class MotionPlayer:
 
         elif self.mode == MotionMode.EVENT:
             self.latest_force = self.get_next_buffer_command()
+            if self.track is not None:
+                self.latest_force = self._add_track_sample(self.latest_force)
 
         elif self.mode == MotionMode.LIVE:
             if signal:
@@ -96,97 +134,62 @@ class MotionPlayer:
 
         return self.latest_force
 
-    def handle_motion(self, motion, behavior="disable", scale = 1.0):
+    def update_block(self, n):
+        """The next n forces of EVENT mode as an (n, 4) array, for rendering ahead of time."""
+        if self.mode != MotionMode.EVENT:
+            return np.zeros((n, 4))
+        blocks = []
+        while n > 0:
+            block = self.mixer.mix(n)
+            blocks.append(block)
+            n -= len(block)
+        return np.concatenate(blocks) if blocks else np.zeros((0, 4))
+
+    def play_track(self, track, position=0.0, rate=1.0):
+        """
+        Play a rendered (N, 4) force track from position seconds on, advancing
+        rate samples per tick, on top of the queued motions.
+        """
+        self.track = track
+        self.track_cursor = position * FREQUENCY
+        self.track_rate = rate
+
+    def stop_track(self):
+        self.track = None
+
+    def _add_track_sample(self, force):
+        index = int(self.track_cursor)
+        if index >= len(self.track):
+            self.track = None
+            return force
+        self.track_cursor += self.track_rate
+        sample = self.track[index]
+        return tuple(min(max(f + float(x), -MASTER_CLIP), MASTER_CLIP) for f, x in zip(force, sample))
+
+    def handle_motion(self, motion, behavior="disable", scale = 1.0, layer=DEFAULT_LAYER):
         motion_sequence = load_motion_shapes(motion)
-    
-        print(f"[MotionPlayer] Handling motion {motion} with behavior: {behavior}, length = {len(motion_sequence)}")
-        print(f"Pointer before: {self.pointer}, start_index: {self.start_index}")
-        N = len(motion_sequence)
-        if N == 0:
-            return
-        scale_abs = abs(scale)
-        if scale_abs <= 1 and scale_abs > 0:
-            motion_sequence = [tuple(x * scale for x in tup) for tup in motion_sequence]
-
-        # Allow only if the last motion is different
-        if behavior == "single" and motion != self.latest_motion:
-            behavior = "replace"
-        
-        # same motion persists, other motion interrupts
-        if behavior == "inherit":
-            behavior = "append" if self.latest_motion == motion else "replace"
-
-        if behavior == "replace":
-            self._reset_buffer()
-            if self.start_index + N > self.buffer_size:
-                return
-            self.buffer[self.start_index:self.start_index+N] = motion_sequence
-            self.accuracy_buffer[self.start_index:self.start_index+N] = [True] * N
-            self.pointer = self.start_index + N
-
-        if behavior == "append":
-            if self.pointer + N > self.buffer_size:
-                return
-            self.buffer[self.pointer:self.pointer+N] = motion_sequence
-            self.accuracy_buffer[self.pointer:self.pointer+N] = [True] * N
-            self.pointer += N
-
-        if behavior == "clear":
-            self._reset_buffer()
-        
-        self.latest_motion = motion
-    
-    def handle_motion_data(self, motion_data, behavior="disable", scale = 1.0):
+        self._queue_sequence(motion, motion_sequence, behavior, scale, layer)
+
+    def handle_motion_data(self, motion_data, behavior="disable", scale = 1.0, layer=DEFAULT_LAYER):
         motion = motion_data.get("name")
         if not motion:
             return
-        motion_sequence = list(zip(
-            motion_data.get("flShape", []),
-            motion_data.get("frShape", []),
-            motion_data.get("rlShape", []),
-            motion_data.get("rrShape", []),
-        ))
-    
-        print(f"[MotionPlayer] Handling motion {motion} with behavior: {behavior}, length = {len(motion_sequence)}")
-        print(f"Pointer before: {self.pointer}, start_index: {self.start_index}")
+        motion_sequence = shapes_from_motion_data(motion_data)
+        self._queue_sequence(motion, motion_sequence, behavior, scale, layer)
+
+    def _queue_sequence(self, motion, motion_sequence, behavior, scale, layer):
+        if self.verbose:
+            print(f"[MotionPlayer] Handling motion {motion} on layer {layer} with behavior: {behavior}, length = {len(motion_sequence)}")
+            print(f"Pointer before: {self.pointer}, start_index: {self.start_index}")
         N = len(motion_sequence)
         if N == 0:
             return
         scale_abs = abs(scale)
         if scale_abs <= 1 and scale_abs > 0:
-            motion_sequence = [tuple(x * scale for x in tup) for tup in motion_sequence]
-
-        # Allow only if the last motion is different
-        if behavior == "single" and motion != self.latest_motion:
-            behavior = "replace"
-        
-        # same motion persists, other motion interrupts
-        if behavior == "inherit":
-            behavior = "append" if self.latest_motion == motion else "replace"
-
-        if behavior == "replace":
-            self._reset_buffer()
-            if self.start_index + N > self.buffer_size:
-                return
-            self.buffer[self.start_index:self.start_index+N] = motion_sequence
-            self.accuracy_buffer[self.start_index:self.start_index+N] = [True] * N
-            self.pointer = self.start_index + N
-
-        if behavior == "append":
-            if self.pointer + N > self.buffer_size:
-                return
-            self.buffer[self.pointer:self.pointer+N] = motion_sequence
-            self.accuracy_buffer[self.pointer:self.pointer+N] = [True] * N
-            self.pointer += N
-
-        if behavior == "clear":
-            self._reset_buffer()
-        
+            motion_sequence = motion_sequence * scale
+
+        self.mixer.queue(layer or DEFAULT_LAYER, motion, motion_sequence, behavior)
         self.latest_motion = motion
 
     def get_next_buffer_command(self):
-        cmd = self.buffer[self.start_index]
-        self.buffer = self.buffer[1:] + [(0, 0, 0, 0)]
-        self.accuracy_buffer = self.accuracy_buffer[1:] + [False]
-        self.pointer = max(self.pointer-1, self.start_index)
-        return cmd
\ No newline at end of file
+        return self.mixer.mix_one()
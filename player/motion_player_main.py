@@ -4,77 +4,91 @@ import time
 import json
 import argparse
 import threading
-from player.motion_player import MotionPlayer, MotionMode, MODE_LIST, TARGET_LIST
+from player.motion_player import MotionPlayer, MotionMode, MODE_LIST, TARGET_LIST, FREQUENCY, motion_cache, load_motion_lib
+from player.tick_scheduler import OVERRUN_POLICIES, DEFAULT_SPIN
+from player.command_queue import CommandQueue
+from player.player_runtime import PlayerRuntime, make_commands
+from player.force_recorder import ForceRecorder, DEFAULT_CAPACITY
+from player.clock_sync import ClockSync, PING_INTERVAL, PING_BURST, PING_BURST_INTERVAL
+from player.trace import Tracer
 from output.bridge_driver import BridgeDriver
-from output.gamepad_driver import GamepadDriver
+from output.gamepad_driver import GamepadDriver, TRANSPORTS, FRAMINGS
+from output.driver_worker import DriverWorker
 from player.player_utils import BRIDGE_API
 
-EMPTY_BEHAVIOR = "disable"
-EMPTY_SCALE = 0.0
+# same as output.arduino_driver.PROTOCOLS, which is only imported for the
+# arduino target so that pyserial stays optional
+ARDUINO_PROTOCOLS = ["text", "binary"]
+TRACE_REPORT_INTERVAL = 1.0
 
-async def main(_mode="none", _target="none", silent=False):
+async def main(_mode="none", _target="none", silent=False, warm=False, overrun="skip", spin=DEFAULT_SPIN,
+               rate=FREQUENCY, arduino_protocol="text", gamepad_transport="tcp", gamepad_framing="newline",
+               clock=None, record=None, record_capacity=DEFAULT_CAPACITY):
     stop_event = threading.Event()
     signal = None
-    motion_command = {}
-    motion_data = {}
+    commands = CommandQueue()
+    clock_sync = ClockSync()
+
+    # only commands the bridge gave a trace id are marked
+    tracer = Tracer(enabled=True)
 
     player = MotionPlayer()
+    runtime = PlayerRuntime(player, commands, clock, rate, overrun, spin, tracer)
     hardware = None
-    send = lambda force: None
+    send = lambda force, traces=None: None
     forces = []
 
     def get_signal():
         nonlocal signal
         return signal
 
-    def get_motion_command():
-        nonlocal motion_command
-        command = motion_command
-        motion_command = {}
-        return command
-    
-    def get_motion_data_command():
-        nonlocal motion_data
-        data = motion_data
-        motion_data = {}
-        return data
-    
     def set_target(target):
         nonlocal hardware, send, _target, signal
         signal = (0, 0, 0, 0)
-        if hasattr(hardware, 'shutdown'):
-            hardware.shutdown()
+        shutdown_hardware()
         
+        # drivers run on their own I/O thread, the tick thread only publishes
         if target == "none":
             hardware = None
-            send = lambda force: None
+            send = lambda force, traces=None: None
         elif target == "bridge":
-            hardware = BridgeDriver(BRIDGE_API)
-            send = lambda force: hardware.send(force)
+            hardware = DriverWorker(BridgeDriver(BRIDGE_API), tracer=tracer)
+            send = lambda force, traces=None: hardware.publish(force, traces)
             hardware.connect()
         elif target == "arduino":
             from output.arduino_driver import ArduinoDriver
-            hardware = ArduinoDriver()
+            hardware = DriverWorker(ArduinoDriver(protocol=arduino_protocol), tracer=tracer)
             hardware.connect()
-            send = lambda force: hardware.send(force)
+            send = lambda force, traces=None: hardware.publish(force, traces)
         elif target == "gamepad":
-            hardware = GamepadDriver()
+            hardware = DriverWorker(GamepadDriver(transport=gamepad_transport, framing=gamepad_framing), tracer=tracer)
             hardware.connect()
-            send = lambda force: hardware.send(force)
+            send = lambda force, traces=None: hardware.publish(force, traces)
         _target = target
+
+    def shutdown_hardware():
+        if hasattr(hardware, 'get_stats'):
+            print(f"Output driver stats: {hardware.get_stats()}")
+        if hasattr(hardware, 'shutdown'):
+            hardware.shutdown()
     
+    # mode requested last, the runtime applies it with the next tick
+    mode_name = "off"
+
     def set_mode(mode):
-        nonlocal signal
+        nonlocal signal, mode_name
         signal = (0, 0, 0, 0)
         if mode == "event":
-            player.set_mode(MotionMode.EVENT)
+            runtime.request_mode(MotionMode.EVENT)
             print("Running EVENT mode using WebSocket input...")
         elif mode == "live":
-            player.set_mode(MotionMode.LIVE)
+            runtime.request_mode(MotionMode.LIVE)
             print("Running LIVE mode using WebSocket input...")
         elif mode == "off":
-            player.set_mode(MotionMode.OFF)
+            runtime.request_mode(MotionMode.OFF)
             print("Running OFF mode...")
+        if mode in MODE_LIST:
+            mode_name = mode
     
     def is_target_connected():
         nonlocal hardware
@@ -83,66 +97,77 @@ async def main(_mode="none", _target="none", silent=False):
         return False
     
     def run_task_sync():
-        nonlocal forces
-        prev_time = time.perf_counter()
-        target_interval = 0.01
-        next_time = time.perf_counter() + target_interval
+        recorder = ForceRecorder(record, TARGET_LIST, record_capacity, runtime.now) if record else None
+        runtime.start()
+        prev_time = runtime.now()
         i = 0
         while not stop_event.is_set():
-            now = time.perf_counter()
+            now = runtime.now()
             dt = (now - prev_time) * 1000
             prev_time = now
-            _signal = get_signal()
-            _command = get_motion_command()
-            _data_command = get_motion_data_command()
-            if _command:
-                player.handle_motion(
-                    _command["motion"], 
-                    _command["behavior"], 
-                    _command["scale"]
-                )
-            elif _data_command:
-                player.handle_motion_data(
-                    _data_command["motion_data"], 
-                    _data_command["behavior"], 
-                    _data_command["scale"]
-                    )
-            force = player.update(_signal)
-            send(force)
+            force = runtime.tick(get_signal())
+            send(force, runtime.traces)
+            if recorder:
+                recorder.record(now, force, _target, runtime.scheduler.last_lateness, runtime.last_command)
             if not silent:
-                print(f"[{player.mode.name} {_target} {i+1}] Sent: {force}, ∆t: {dt:.2f} ms")
-            next_time += target_interval
-            time.sleep(max(0, next_time - time.perf_counter()))
+                print(f"[{player.mode.name} {_target} {i+1}] Sent: {force}, ∆t: {dt:.2f} ms, late: {runtime.scheduler.last_lateness * 1000:.3f} ms")
+            runtime.wait()
             i += 1
         
-        if hasattr(hardware, 'shutdown'):
-            hardware.shutdown()
+        print(f"Tick scheduler stats: {runtime.scheduler.get_stats()}")
+        print(f"Command queue stats: {commands.get_stats()}")
+        print(f"Clock sync stats: {clock_sync.get_stats()}")
+        if recorder:
+            recorder.close()
+            print(f"Force recorder stats: {recorder.get_stats()}")
+        shutdown_hardware()
+
+    def to_start_at(start_time):
+        """Convert a start time on the bridge clock to a deadline on the runtime clock."""
+        if start_time is None:
+            return None
+        return runtime.now() + clock_sync.to_local(start_time) - time.time()
+
+    async def ping_task(ws):
+        for _ in range(PING_BURST):
+            await ws.send(json.dumps(clock_sync.make_ping()))
+            await asyncio.sleep(PING_BURST_INTERVAL)
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            await ws.send(json.dumps(clock_sync.make_ping()))
+
+    async def trace_task(ws):
+        """Report trace marks to the bridge, which keeps the traces of both processes."""
+        while True:
+            await asyncio.sleep(TRACE_REPORT_INTERVAL)
+            marks = tracer.drain()
+            if marks:
+                await ws.send(json.dumps({"command": "trace", "marks": marks}))
 
     async def listen_task():
-        nonlocal signal, motion_command, motion_data
+        nonlocal signal
+        pinger = None
+        tracing = None
         try:
             async with websockets.connect(BRIDGE_API) as ws:
                 await ws.send(json.dumps({
-                    "mode": player.mode.name.lower(), 
+                    "mode": mode_name,
                     "target": _target,
                     "target_connected": is_target_connected()
                     }))
+                pinger = asyncio.create_task(ping_task(ws))
+                tracing = asyncio.create_task(trace_task(ws))
                 async for msg in ws:
                     data = json.loads(msg)
-                    if data.get("command") in ["signal", "motion", "motion_data"]:
-                        signal = data.get("signal")
-                        if data.get("motion"):
-                            motion_command = {
-                                "motion": data.get("motion"),
-                                "behavior": data.get("behavior", EMPTY_BEHAVIOR),
-                                "scale": data.get("scale", EMPTY_SCALE)
-                            }
-                        elif data.get("motion_data"):
-                            motion_data = {
-                                "motion_data": data.get("motion_data"),
-                                "behavior": data.get("behavior", EMPTY_BEHAVIOR),
-                                "scale": data.get("scale", EMPTY_SCALE)
-                            }
+                    if data.get("trace_id"):
+                        tracer.mark(data["trace_id"], "player_receive")
+                    if data.get("command") == "pong":
+                        clock_sync.on_pong(data)
+                    elif data.get("command") in ["signal", "motion", "motion_data", "layer", "track"]:
+                        if data.get("command") in ["signal", "motion", "motion_data"]:
+                            signal = data.get("signal")
+                        for command in make_commands(data, to_start_at(data.get("start_time"))):
+                            commands.put(command)
                     else:
                         if data.get("command") == "shutdown":
                             break
@@ -153,7 +178,7 @@ async def main(_mode="none", _target="none", silent=False):
                         if new_target:
                             set_target(new_target)
                         await ws.send(json.dumps({
-                            "mode": player.mode.name.lower(), 
+                            "mode": mode_name,
                             "target": _target,
                             "target_connected": is_target_connected()
                             }))
@@ -162,8 +187,16 @@ async def main(_mode="none", _target="none", silent=False):
         except Exception as e:
             print(f"Unexpected error: {e}.")
         finally:
+            if pinger:
+                pinger.cancel()
+            if tracing:
+                tracing.cancel()
             stop_event.set()
     
+    if warm:
+        motion_cache.warm(load_motion_lib(include_none=False))
+        print(f"Warmed motion cache: {motion_cache.stats()}")
+
     set_target(_target)
     set_mode(_mode)
 
@@ -171,6 +204,7 @@ async def main(_mode="none", _target="none", silent=False):
     run_thread.start()
 
     await listen_task()
+    run_thread.join(timeout=1)
 
 
 if __name__ == "__main__":
@@ -178,5 +212,16 @@ if __name__ == "__main__":
     parser.add_argument("-m", "--mode", choices=MODE_LIST, default="off", help="Player playback mode")
     parser.add_argument("-t", "--target", choices=TARGET_LIST, default="none", help="Player force output target")
     parser.add_argument("-s", "--silent", action="store_true", help="Disable console output")
+    parser.add_argument("-w", "--warm", action="store_true", help="Preload every motion into the cache at startup")
+    parser.add_argument("-o", "--overrun", choices=OVERRUN_POLICIES, default="skip", help="What to do with ticks missed after an overrun")
+    parser.add_argument("--spin", type=float, default=DEFAULT_SPIN * 1000, help="Busy-wait window before each tick deadline in ms, 0 to only sleep")
+    parser.add_argument("-r", "--rate", type=int, default=FREQUENCY, help=f"Output rate in Hz, a multiple of {FREQUENCY}")
+    parser.add_argument("--arduino-protocol", choices=ARDUINO_PROTOCOLS, default="text", help="Serial protocol of the arduino target")
+    parser.add_argument("--gamepad-transport", choices=TRANSPORTS, default="tcp", help="Socket transport of the gamepad target")
+    parser.add_argument("--gamepad-framing", choices=FRAMINGS, default="newline", help="Message framing of the gamepad target over tcp")
+    parser.add_argument("--record", help="Record every tick to this session file, read it with python -m player.force_recorder")
+    parser.add_argument("--record-capacity", type=int, default=DEFAULT_CAPACITY, help="Ticks per recorded session file")
     args = parser.parse_args()
-    asyncio.run(main(args.mode, args.target, args.silent))
\ No newline at end of file
+    asyncio.run(main(args.mode, args.target, args.silent, args.warm, args.overrun, args.spin / 1000,
+                     args.rate, args.arduino_protocol, args.gamepad_transport, args.gamepad_framing,
+                     record=args.record, record_capacity=args.record_capacity))
\ No newline at end of file
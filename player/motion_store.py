@@ -0,0 +1,195 @@
+# player/motion_store.py
+#
+# Motions are stored in one of two formats inside the motion directory:
+#   json:   <name>.json holding metadata and the four shape lists
+#   binary: <name>.npy holding an (N, 4) float32/float16 sample array, plus
+#           <name>.meta.json holding the remaining metadata
+# Readers accept either format. When both exist, the binary one wins.
+#
+# Migrate the existing library with:
+#   python -m player.motion_store migrate [--dtype float16] [--keep-json]
+
+import argparse
+import json
+import os
+from pathlib import Path
+import numpy as np
+
+MOTION_DIR = Path("motions/")
+SHAPE_KEYS = ["flShape", "frShape", "rlShape", "rrShape"]
+JSON_SUFFIX = ".json"
+SAMPLES_SUFFIX = ".npy"
+META_SUFFIX = ".meta.json"
+SAMPLES_KEY = "_samples"
+STORE_FORMATS = ["json", "binary"]
+DEFAULT_FORMAT = "json"
+SAMPLE_DTYPES = ["float32", "float16"]
+
+def json_path(name, motion_dir=MOTION_DIR):
+    return Path(motion_dir) / f"{name}{JSON_SUFFIX}"
+
+def samples_path(name, motion_dir=MOTION_DIR):
+    return Path(motion_dir) / f"{name}{SAMPLES_SUFFIX}"
+
+def meta_path(name, motion_dir=MOTION_DIR):
+    return Path(motion_dir) / f"{name}{META_SUFFIX}"
+
+def motion_format(name, motion_dir=MOTION_DIR):
+    if samples_path(name, motion_dir).exists() and meta_path(name, motion_dir).exists():
+        return "binary"
+    if json_path(name, motion_dir).exists():
+        return "json"
+    return None
+
+def motion_exists(name, motion_dir=MOTION_DIR):
+    return motion_format(name, motion_dir) is not None
+
+def samples_file(name, motion_dir=MOTION_DIR):
+    """Path of the file holding the samples of a motion, used for change detection."""
+    if motion_format(name, motion_dir) == "binary":
+        return samples_path(name, motion_dir)
+    return json_path(name, motion_dir)
+
+def motion_name(filename):
+    """Name of the motion a file in the motion directory belongs to, dots included."""
+    if filename.endswith(META_SUFFIX):
+        return filename[:-len(META_SUFFIX)]
+    return Path(filename).stem
+
+def list_motions(motion_dir=MOTION_DIR):
+    names = {}
+    for f in Path(motion_dir).iterdir():
+        if f.is_file() and f.name.endswith((JSON_SUFFIX, SAMPLES_SUFFIX)) and not f.name.startswith("."):
+            names.setdefault(motion_name(f.name), None)
+    return list(names)
+
+def shapes_from_motion_data(motion_data):
+    """
+    Stack the four actuator shapes of a motion into an (N, 4) float array.
+    Shapes of unequal length are truncated to the shortest one.
+    """
+    shapes = [np.asarray(motion_data.get(key, []), dtype=float) for key in SHAPE_KEYS]
+    n = min(len(shape) for shape in shapes)
+    return np.stack([shape[:n] for shape in shapes], axis=1)
+
+def read_shapes_file(path, mmap=True):
+    """Read the (N, 4) samples from either a .npy or a .json motion file."""
+    path = Path(path)
+    if path.suffix == SAMPLES_SUFFIX:
+        return np.load(path, mmap_mode="r" if mmap else None)
+    with open(path, "r") as f:
+        motion_data = json.load(f)
+    return shapes_from_motion_data(motion_data)
+
+def read_shapes(name, motion_dir=MOTION_DIR, mmap=True):
+    return read_shapes_file(samples_file(name, motion_dir), mmap)
+
+def read_metadata(name, motion_dir=MOTION_DIR):
+    """Read a motion without its shapes. Returns None if the motion does not exist."""
+    fmt = motion_format(name, motion_dir)
+    if fmt == "binary":
+        with open(meta_path(name, motion_dir), "r") as f:
+            metadata = json.load(f)
+        metadata.pop(SAMPLES_KEY, None)
+        return metadata
+    if fmt == "json":
+        with open(json_path(name, motion_dir), "r") as f:
+            metadata = json.load(f)
+        for key in SHAPE_KEYS:
+            metadata.pop(key, None)
+        return metadata
+    return None
+
+def read_motion(name, motion_dir=MOTION_DIR, as_lists=True):
+    """
+    Read a full motion in either format. Returns None if the motion does not exist.
+    With as_lists=False, binary motions keep their shapes as float arrays.
+    """
+    fmt = motion_format(name, motion_dir)
+    if fmt == "json":
+        with open(json_path(name, motion_dir), "r") as f:
+            return json.load(f)
+    if fmt != "binary":
+        return None
+    motion_data = read_metadata(name, motion_dir)
+    samples = read_shapes_file(samples_path(name, motion_dir))
+    for i, key in enumerate(SHAPE_KEYS):
+        shape = samples[:, i].astype(float)
+        motion_data[key] = shape.tolist() if as_lists else shape
+    return motion_data
+
+def _replace_atomic(path, write):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def _write_json(motion_data, motion_dir, name):
+    path = json_path(name, motion_dir)
+    _replace_atomic(path, lambda f: f.write(json.dumps(motion_data, indent=4).encode()))
+    return path
+
+def _write_binary(motion_data, motion_dir, name, dtype):
+    samples = shapes_from_motion_data(motion_data).astype(dtype)
+    metadata = {k: v for k, v in motion_data.items() if k not in SHAPE_KEYS}
+    metadata[SAMPLES_KEY] = {"dtype": dtype, "length": len(samples)}
+    path = samples_path(name, motion_dir)
+    _replace_atomic(path, lambda f: np.save(f, samples))
+    _replace_atomic(meta_path(name, motion_dir), lambda f: f.write(json.dumps(metadata, indent=4).encode()))
+    return path
+
+def write_motion(motion_data, motion_dir=MOTION_DIR, fmt=None, dtype="float32", name=None):
+    """
+    Write a motion under name, defaulting to motion_data["name"]. Without an
+    explicit format an existing motion keeps its current format and a new one
+    uses DEFAULT_FORMAT. Returns the path of the written samples.
+    """
+    name = name or motion_data["name"]
+    fmt = fmt or motion_format(name, motion_dir) or DEFAULT_FORMAT
+    if fmt not in STORE_FORMATS:
+        raise ValueError(f"Unknown motion format {fmt}. Valid formats: {STORE_FORMATS}")
+    if dtype not in SAMPLE_DTYPES:
+        raise ValueError(f"Unknown sample dtype {dtype}. Valid dtypes: {SAMPLE_DTYPES}")
+
+    if fmt == "json":
+        path = _write_json(motion_data, motion_dir, name)
+        samples_path(name, motion_dir).unlink(missing_ok=True)
+        meta_path(name, motion_dir).unlink(missing_ok=True)
+    else:
+        path = _write_binary(motion_data, motion_dir, name, dtype)
+        json_path(name, motion_dir).unlink(missing_ok=True)
+    return path
+
+def rename_motion(name, new_name, motion_dir=MOTION_DIR):
+    for path_of in (json_path, samples_path, meta_path):
+        path = path_of(name, motion_dir)
+        if path.exists():
+            path.rename(path_of(new_name, motion_dir))
+
+def delete_motion(name, motion_dir=MOTION_DIR):
+    for path in (json_path(name, motion_dir), samples_path(name, motion_dir), meta_path(name, motion_dir)):
+        path.unlink(missing_ok=True)
+
+def migrate(motion_dir=MOTION_DIR, dtype="float32", keep_json=False):
+    """Convert every JSON motion in motion_dir to the binary format."""
+    migrated = []
+    for name in list_motions(motion_dir):
+        if motion_format(name, motion_dir) != "json":
+            continue
+        _write_binary(read_motion(name, motion_dir), motion_dir, name, dtype)
+        if not keep_json:
+            json_path(name, motion_dir).unlink()
+        migrated.append(name)
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Convert JSON motions to the binary format")
+    migrate_parser.add_argument("-d", "--dir", default=str(MOTION_DIR), help="Motion directory")
+    migrate_parser.add_argument("--dtype", choices=SAMPLE_DTYPES, default="float32", help="Sample precision")
+    migrate_parser.add_argument("--keep-json", action="store_true", help="Keep the original JSON files")
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrated = migrate(Path(args.dir), args.dtype, args.keep_json)
+        print(f"Migrated {len(migrated)} motions to the binary format.")
@@ -0,0 +1,94 @@
+# player/offline_player.py
+#
+# Plays a timestamped command script through the player runtime without a
+# MotionBridge and writes the resulting force stream. On the default virtual
+# clock ticks run back to back, so a 10 minute session renders in seconds.
+#
+#   python -m player.offline_player script.jsonl -o forces.npy
+#   python -m player.offline_player script.jsonl -o forces.csv --clock real
+#
+# The script is a JSON array or JSON lines of bridge messages with a "time"
+# in seconds from the start, for example
+#   {"time": 0.5, "command": "motion", "motion": "LeftHit", "behavior": "replace", "scale": 1.0}
+#   {"time": 2.0, "command": "layer", "layer": "video", "gain": 0.5}
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from pathlib import Path
+import numpy as np
+from player.motion_player import MotionPlayer, MotionMode, FREQUENCY
+from player.command_queue import CommandQueue
+from player.player_clock import CLOCKS, VirtualClock
+from player.player_runtime import PlayerRuntime, make_commands
+
+# seconds rendered after the last command at most, when the length is not given
+MAX_TAIL = 60.0
+
+def load_script(path):
+    text = Path(path).read_text()
+    if text.lstrip().startswith("["):
+        script = json.loads(text)
+    else:
+        script = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return sorted(script, key=lambda message: message.get("time", 0.0))
+
+def run_offline(script, clock=None, rate=FREQUENCY, duration=None):
+    """
+    Play a script through a PlayerRuntime in EVENT mode. Every command takes
+    effect at the tick closest to its time. Without a duration the stream
+    ends once the last command has been applied and the player is idle.
+    Returns the (ticks, 4) force stream and the runtime.
+    """
+    player = MotionPlayer()
+    player.set_mode(MotionMode.EVENT)
+    runtime = PlayerRuntime(player, CommandQueue(), clock or VirtualClock(), rate)
+    runtime.start()
+    origin = runtime.now()
+    for message in script:
+        for command in make_commands(message):
+            command["start_at"] = origin + message.get("time", 0.0)
+            runtime.schedule(command)
+
+    last_time = script[-1].get("time", 0.0) if script else 0.0
+    end_time = duration if duration is not None else last_time + MAX_TAIL
+    ticks = round(end_time * FREQUENCY * runtime.upsample)
+    forces = np.zeros((ticks, 4))
+    for i in range(ticks):
+        forces[i] = runtime.tick()
+        idle = not runtime.scheduled and not player.mixer.queued.any() and player.track is None
+        if duration is None and idle and runtime.now() - origin >= last_time:
+            return forces[:i + 1], runtime
+        runtime.wait()
+    return forces, runtime
+
+def write_forces(path, forces):
+    path = Path(path)
+    if path.suffix == ".csv":
+        np.savetxt(path, forces, delimiter=",", header="fl,fr,rl,rr", comments="")
+    else:
+        np.save(path, forces.astype(np.float32))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("script", help="JSON or JSON lines command script")
+    parser.add_argument("-o", "--out", help="Force stream output, .npy or .csv")
+    parser.add_argument("-c", "--clock", choices=list(CLOCKS), default="virtual", help="Runtime clock")
+    parser.add_argument("-r", "--rate", type=int, default=FREQUENCY, help=f"Output rate in Hz, a multiple of {FREQUENCY}")
+    parser.add_argument("-d", "--duration", type=float, help="Length of the stream in seconds, by default until the player is idle")
+    parser.add_argument("-s", "--silent", action="store_true", help="Disable player console output")
+    args = parser.parse_args()
+
+    script = load_script(args.script)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if args.silent else contextlib.nullcontext():
+        forces, runtime = run_offline(script, CLOCKS[args.clock](), args.rate, args.duration)
+    elapsed = time.perf_counter() - start
+    if args.out:
+        write_forces(args.out, forces)
+    played = len(forces) / (FREQUENCY * runtime.upsample)
+    print(f"Rendered {len(forces)} ticks ({played:.2f} s) of {len(script)} commands in {elapsed:.3f} s, "
+          f"{len(forces) / elapsed:.0f} ticks/s, {played / elapsed:.1f}x real time.")
+    print(f"Tick scheduler stats: {runtime.scheduler.get_stats()}")
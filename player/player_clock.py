@@ -0,0 +1,40 @@
+# player/player_clock.py
+
+import math
+import time
+
+class RealClock:
+    """Wall-clock time of the player runtime, perf_counter and time.sleep."""
+    realtime = True
+
+    def now(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class VirtualClock:
+    """
+    Clock that only moves when slept on, so a runtime driven by it steps
+    through ticks as fast as the CPU allows.
+
+    Time is kept in whole nanoseconds and sleeps overshoot by up to one, so
+    sleeping until a deadline always reaches it despite float rounding.
+    Busy-waiting on it never ends, schedulers must not spin.
+    """
+    realtime = False
+
+    def __init__(self, start=0.0):
+        self.ns = round(start * 1e9)
+
+    def now(self):
+        return self.ns / 1e9
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.ns += math.floor(seconds * 1e9) + 1
+
+CLOCKS = {
+    "real": RealClock,
+    "virtual": VirtualClock,
+}
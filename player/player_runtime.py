@@ -0,0 +1,186 @@
+# player/player_runtime.py
+
+import heapq
+import itertools
+from player.motion_player import FREQUENCY
+from player.motion_mixer import DEFAULT_LAYER, LAYERS
+from player.force_track import load_track
+from player.tick_scheduler import TickScheduler, DEFAULT_SPIN, start_horizon
+from player.player_clock import RealClock
+
+EMPTY_BEHAVIOR = "disable"
+EMPTY_SCALE = 0.0
+TICK_INTERVAL = 0.01
+
+def make_commands(data, start_at=None):
+    """
+    Player commands of one bridge message, a motion and a motion_data
+    command can share a message. Messages referring to an unknown layer or
+    an uncached force track give no command.
+    """
+    commands = []
+    layer = data.get("layer")
+    if layer and layer not in LAYERS:
+        print(f"Unknown layer {layer}, command ignored.")
+        return commands
+    if data.get("command") in ["signal", "motion", "motion_data"]:
+        for key in ["motion", "motion_data"]:
+            if data.get(key):
+                commands.append({
+                    "command": key,
+                    key: data.get(key),
+                    "behavior": data.get("behavior", EMPTY_BEHAVIOR),
+                    "scale": data.get("scale", EMPTY_SCALE),
+                    "layer": data.get("layer") or DEFAULT_LAYER,
+                    "start_at": start_at,
+                    "trace_id": data.get("trace_id")
+                })
+    elif data.get("command") == "layer":
+        if data.get("layer"):
+            commands.append({
+                "command": "layer",
+                "config": {
+                    key: data.get(key)
+                    for key in ["layer", "gain", "priority", "clip", "duck"]
+                }
+            })
+    elif data.get("command") == "track":
+        samples = None
+        if data.get("track"):
+            samples = load_track(data["track"])
+            if samples is None:
+                print(f"Force track {data['track']} not found.")
+                return commands
+        commands.append({
+            "command": "track",
+            "samples": samples,
+            "position": data.get("position", 0.0),
+            "rate": data.get("rate", 1.0),
+            "start_at": start_at
+        })
+    return commands
+
+class PlayerRuntime:
+    """
+    Tick loop of a MotionPlayer on an injectable clock.
+
+    Commands are drained from a CommandQueue once per motion sample and
+    applied right away, or at the tick closest to their start_at on the
+    runtime clock. Every command gets an id in arrival order, and
+    last_command holds the id of the command applied most recently. Above
+    FREQUENCY every motion sample is spread over several output ticks by
+    linear interpolation, which delays the output by one sample.
+
+    With a RealClock the ticks follow wall-clock time. With a VirtualClock
+    wait() only advances the clock, so the same loop runs as fast as the CPU
+    allows, for offline rendering, regression tests and benchmarks.
+
+    Mode changes do not go through the command queue, which drops commands
+    when full. request_mode() keeps the newest one in a slot that the next
+    tick applies, before the commands it drains.
+
+    With a tracer, commands carrying a trace id are marked when they are
+    handled and at the tick that plays them, and traces holds the ids of
+    the commands that started playing on the current tick.
+    """
+    def __init__(self, player, commands, clock=None, rate=FREQUENCY, overrun="skip", spin=DEFAULT_SPIN, tracer=None):
+        self.player = player
+        self.commands = commands
+        self.clock = clock or RealClock()
+        self.upsample = max(1, round(rate / FREQUENCY))
+        self.scheduler = TickScheduler(
+            TICK_INTERVAL / self.upsample, overrun, spin if self.clock.realtime else 0,
+            clock=self.clock.now, sleep=self.clock.sleep
+        )
+        # commands with a start time wait here until the tick closest to it
+        self.scheduled = []
+        self.sequence = itertools.count()
+        self.command_ids = itertools.count(1)
+        self.last_command = 0
+        self.previous_force = self.next_force = (0, 0, 0, 0)
+        self.ticks = 0
+        self.tracer = tracer
+        self.traces = []
+        # (request number, mode), replaced as a whole from the listener thread
+        self.mode_request = (0, None)
+        self.applied_mode_request = 0
+
+    def now(self):
+        return self.clock.now()
+
+    def start(self):
+        """Put the first tick deadline one tick interval from now."""
+        self.scheduler.restart()
+
+    def handle_command(self, command):
+        player = self.player
+        self.last_command = command.get("id", 0)
+        if self.tracer and command.get("trace_id"):
+            self.tracer.mark(command["trace_id"], "handle")
+            self.traces.append(command["trace_id"])
+        if command["command"] == "motion":
+            player.handle_motion(
+                command["motion"],
+                command["behavior"],
+                command["scale"],
+                command["layer"]
+            )
+        elif command["command"] == "motion_data":
+            player.handle_motion_data(
+                command["motion_data"],
+                command["behavior"],
+                command["scale"],
+                command["layer"]
+                )
+        elif command["command"] == "layer":
+            player.configure_layer(**command["config"])
+        elif command["command"] == "track":
+            if command["samples"] is None:
+                player.stop_track()
+            else:
+                player.play_track(command["samples"], command["position"], command["rate"])
+
+    def schedule(self, command, horizon=None):
+        """Apply a command now, or keep it until the tick closest to its start_at."""
+        command.setdefault("id", next(self.command_ids))
+        if horizon is None:
+            horizon = start_horizon(self.now(), TICK_INTERVAL)
+        start_at = command.get("start_at")
+        if start_at and start_at > horizon:
+            heapq.heappush(self.scheduled, (start_at, next(self.sequence), command))
+        else:
+            self.handle_command(command)
+
+    def request_mode(self, mode):
+        """Switch the player to mode at the next tick, from any thread."""
+        self.mode_request = (self.mode_request[0] + 1, mode)
+
+    def pending(self):
+        return len(self.scheduled) + len(self.commands)
+
+    def tick(self, signal=None):
+        """Run one output tick and return its force."""
+        phase = self.ticks % self.upsample
+        if self.traces:
+            self.traces = []
+        if phase == 0:
+            number, mode = self.mode_request
+            if number != self.applied_mode_request:
+                self.applied_mode_request = number
+                self.player.set_mode(mode)
+            horizon = start_horizon(self.now(), TICK_INTERVAL)
+            for command in self.commands.drain():
+                self.schedule(command, horizon)
+            while self.scheduled and self.scheduled[0][0] <= horizon:
+                self.handle_command(heapq.heappop(self.scheduled)[2])
+            self.previous_force, self.next_force = self.next_force, self.player.update(signal)
+            for trace_id in self.traces:
+                self.tracer.mark(trace_id, "tick")
+        self.ticks += 1
+        if self.upsample == 1:
+            return self.next_force
+        t = (phase + 1) / self.upsample
+        return tuple(p + (n - p) * t for p, n in zip(self.previous_force, self.next_force))
+
+    def wait(self):
+        return self.scheduler.wait()
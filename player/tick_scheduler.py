@@ -0,0 +1,101 @@
+# player/tick_scheduler.py
+
+import math
+import time
+
+OVERRUN_POLICIES = ["skip", "catchup", "stretch"]
+DEFAULT_SPIN = 0.002
+LATE_THRESHOLD = 0.001
+# float noise tolerated when an offset falls on the middle between two ticks
+HALF_TICK_TOLERANCE = 1e-6
+
+# A timed command is applied at the first tick within half an interval of its
+# start, that is the closest tick and the earlier one of two equally close.
+# start_horizon() is the rule on a running clock, start_tick() the same rule
+# on the tick grid, for rendering without a clock.
+def start_horizon(now, interval):
+    """Latest start time of the commands applied at a tick running at now."""
+    return now + interval / 2
+
+def start_tick(offset, interval):
+    """Index of the tick a command starting offset seconds after tick 0 is applied at."""
+    return max(0, math.ceil(offset / interval - 0.5 - HALF_TICK_TOLERANCE))
+
+class TickScheduler:
+    """
+    Waits for fixed-interval tick deadlines without accumulating drift.
+
+    Deadlines sit on a fixed grid (start + k * interval). Waiting sleeps
+    until spin seconds before the deadline and busy-waits the rest, since
+    time.sleep alone can overshoot by several milliseconds. With spin=0 the
+    scheduler only sleeps.
+
+    When a tick runs past one or more following deadlines the overrun
+    policy decides what happens next:
+        skip:    drop the missed deadlines and wait for the next one on the grid
+        catchup: run the missed ticks back to back until the grid is reached
+        stretch: restart the grid one interval after the late tick
+    """
+    def __init__(self, interval, policy="skip", spin=DEFAULT_SPIN, clock=time.perf_counter, sleep=time.sleep):
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy {policy}. Valid policies: {OVERRUN_POLICIES}")
+        self.interval = interval
+        self.policy = policy
+        self.spin = spin
+        self.clock = clock
+        self.sleep = sleep
+        self.next_time = self.clock() + interval
+        self.reset_stats()
+
+    def restart(self):
+        """Start a new deadline grid one interval from now."""
+        self.next_time = self.clock() + self.interval
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.late_ticks = 0
+        self.missed_ticks = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.last_lateness = 0.0
+
+    def wait(self):
+        """Wait for the next deadline and return how late the wake-up was, in seconds."""
+        deadline = self.next_time
+        remaining = deadline - self.clock()
+        if remaining > self.spin:
+            self.sleep(remaining - self.spin)
+        while self.clock() < deadline:
+            pass
+
+        now = self.clock()
+        lateness = now - deadline
+        self._account(lateness)
+
+        missed = int(lateness // self.interval)
+        if missed and self.policy == "skip":
+            self.missed_ticks += missed
+            self.next_time = deadline + (missed + 1) * self.interval
+        elif missed and self.policy == "stretch":
+            self.missed_ticks += missed
+            self.next_time = now + self.interval
+        else:
+            self.next_time = deadline + self.interval
+        return lateness
+
+    def _account(self, lateness):
+        self.ticks += 1
+        self.last_lateness = lateness
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        if lateness > LATE_THRESHOLD:
+            self.late_ticks += 1
+
+    def get_stats(self):
+        return {
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "missed_ticks": self.missed_ticks,
+            "mean_lateness_ms": self.total_lateness / self.ticks * 1000 if self.ticks else 0.0,
+            "max_lateness_ms": self.max_lateness * 1000,
+        }
@@ -0,0 +1,137 @@
+# player/trace.py
+#
+# Latency tracing of motion commands across MotionBridge and MotionPlayer.
+# The bridge assigns a trace id to an input message and carries it in the
+# motion package. Each stage marks the id with a time.perf_counter() stamp,
+# which is QueryPerformanceCounter on Windows and CLOCK_MONOTONIC on Linux,
+# both one sub-microsecond clock for every process of the machine. The player
+# reports its marks back to the bridge, which exports all of them as
+# Chrome trace / Perfetto JSON and summarizes them per stage.
+
+from collections import deque
+import itertools
+import threading
+import time
+import numpy as np
+
+STAGES = ["ingest", "mapped", "bridge_send", "player_receive", "handle", "tick", "driver_send"]
+STAGE_PROCESS = {
+    "ingest": "bridge",
+    "mapped": "bridge",
+    "bridge_send": "bridge",
+    "player_receive": "player",
+    "handle": "player",
+    "tick": "player",
+    "driver_send": "player",
+}
+PROCESS_IDS = {"bridge": 1, "player": 2}
+HISTOGRAM_BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+TRACE_CAPACITY = 100000
+
+class Tracer:
+    """
+    Bounded buffer of (trace id, stage, time) marks.
+
+    mark() is a deque append, safe from any thread, and a no-op while
+    tracing is disabled. The oldest marks are dropped once capacity is
+    reached.
+    """
+    def __init__(self, enabled=False, capacity=TRACE_CAPACITY, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.marks = deque(maxlen=capacity)
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def new_id(self):
+        return next(self.ids)
+
+    def mark(self, trace_id, stage, t=None):
+        if not self.enabled:
+            return
+        self.marks.append((trace_id, stage, self.clock() if t is None else t))
+
+    def add(self, marks):
+        """Add marks reported by another process, keeping only well-formed ones."""
+        if not self.enabled or not isinstance(marks, list):
+            return
+        for mark in marks:
+            if (
+                isinstance(mark, (list, tuple)) and len(mark) == 3
+                and type(mark[0]) is int and mark[1] in STAGE_PROCESS
+                and type(mark[2]) in (int, float)
+            ):
+                self.marks.append(tuple(mark))
+
+    def drain(self):
+        """Remove and return every mark, for sending them to another process."""
+        with self.lock:
+            marks = []
+            while self.marks:
+                marks.append(self.marks.popleft())
+            return marks
+
+    def clear(self):
+        self.marks.clear()
+
+    def traces(self):
+        """Marks grouped by trace id, each as a list of (stage, time) in stage order."""
+        traces = {}
+        for trace_id, stage, t in list(self.marks):
+            if stage in STAGE_PROCESS:
+                traces.setdefault(trace_id, {}).setdefault(stage, t)
+        return {
+            trace_id: sorted(stages.items(), key=lambda item: STAGES.index(item[0]))
+            for trace_id, stages in traces.items()
+        }
+
+    def intervals(self):
+        """Durations between consecutive marked stages, in seconds, by "from→to" name."""
+        intervals = {}
+        for stages in self.traces().values():
+            for (start_stage, start), (end_stage, end) in zip(stages, stages[1:]):
+                intervals.setdefault(f"{start_stage}→{end_stage}", []).append(end - start)
+            if len(stages) > 1:
+                intervals.setdefault("total", []).append(stages[-1][1] - stages[0][1])
+        return intervals
+
+    def summary(self):
+        """Latency histogram in ms of every stage interval, plus its mean and percentiles."""
+        result = {}
+        for name, durations in self.intervals().items():
+            values = np.asarray(durations) * 1000
+            counts = np.histogram(values, bins=[-np.inf] + HISTOGRAM_BUCKETS_MS + [np.inf])[0]
+            result[name] = {
+                "count": len(values),
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(np.percentile(values, 50)),
+                "p95_ms": float(np.percentile(values, 95)),
+                "max_ms": float(values.max()),
+                "histogram": {
+                    f"le_{bound}": int(count)
+                    for bound, count in zip(HISTOGRAM_BUCKETS_MS + ["inf"], counts)
+                },
+            }
+        return result
+
+    def chrome_trace(self):
+        """
+        Every stage interval as an async slice, one track per trace id,
+        in the Chrome trace event format that Perfetto also opens.
+        """
+        events = [
+            {"ph": "M", "name": "process_name", "pid": pid, "args": {"name": name}}
+            for name, pid in PROCESS_IDS.items()
+        ]
+        for trace_id, stages in self.traces().items():
+            for (start_stage, start), (end_stage, end) in zip(stages, stages[1:]):
+                common = {
+                    "cat": "motion",
+                    "name": f"{start_stage}→{end_stage}",
+                    "id": trace_id,
+                    "pid": PROCESS_IDS[STAGE_PROCESS[end_stage]],
+                    "tid": 1,
+                }
+                events.append({**common, "ph": "b", "ts": start * 1e6, "args": {"trace_id": trace_id}})
+                events.append({**common, "ph": "e", "ts": end * 1e6})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}